@@ -1,29 +1,420 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Depends, Response, Cookie, Header
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Depends, Response, Cookie, Header, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.routing import Match
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from pymongo import IndexModel, InsertOne, UpdateOne, DeleteOne, ReturnDocument, ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure, DuplicateKeyError, BulkWriteError
+from pymongo import monitoring
+from gridfs.errors import NoFile
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, ValidationError
+from typing import Dict, List, Literal, Optional
 import uuid
 from datetime import datetime, timezone, timedelta
-from emergentintegrations.llm.chat import LlmChat, UserMessage
 import json
+import orjson
+import csv
+import tempfile
 import base64
+import time
+import codecs
+import hashlib
+import hmac
+import shutil
+import re
+import io
+import math
+import random
+from collections import Counter
+from urllib.parse import quote
+from html.parser import HTMLParser
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import threading
+import multiprocessing
+import httpx
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Metrics, exposed in Prometheus text format at /metrics
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class CounterMetric:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> list:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in self._values.items()]
+
+class GaugeMetric(CounterMetric):
+    kind = "gauge"
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+class HistogramMetric:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for n, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[n] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> list:
+        lines = []
+        with self._lock:
+            for labels, series in self._series.items():
+                for n, bound in enumerate(self.buckets):
+                    le = _format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{le} {series[n]}")
+                le = _format_labels(self.labelnames, labels, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+HTTP_REQUEST_SECONDS = HistogramMetric(
+    "http_request_duration_seconds", "Time until the last response byte is sent, by route template.", ("method", "route", "status"))
+HTTP_IN_FLIGHT = GaugeMetric("http_requests_in_flight", "Requests currently being handled.", ("method", "route"))
+MONGO_COMMAND_SECONDS = HistogramMetric(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection and command.", ("collection", "command", "outcome"))
+LLM_REQUEST_SECONDS = HistogramMetric("llm_request_duration_seconds", "Full LLM response time.", ("model", "outcome"))
+LLM_FIRST_CHUNK_SECONDS = HistogramMetric("llm_time_to_first_chunk_seconds", "Time until the first streamed chunk.", ("model",))
+LLM_PROMPT_CHARS = HistogramMetric("llm_prompt_chars", "Prompt size sent to the LLM.", ("model",), SIZE_BUCKETS)
+LLM_RESPONSE_CHARS = HistogramMetric("llm_response_chars", "Response size received from the LLM.", ("model",), SIZE_BUCKETS)
+DECK_STAGE_SECONDS = HistogramMetric(
+    "deck_generation_stage_seconds", "Time spent in each deck-generation stage.", ("stage",))
+AUTH_SERVICE_REQUESTS = CounterMetric(
+    "auth_service_requests_total", "Session-data lookups against the auth service.", ("outcome",))
+LLM_QUEUE_DEPTH = GaugeMetric("llm_queue_depth", "LLM calls waiting for a concurrency slot.")
+LLM_ACTIVE = GaugeMetric("llm_active_calls", "LLM calls currently holding a slot.")
+LLM_QUEUE_WAIT_SECONDS = HistogramMetric("llm_queue_wait_seconds", "Time LLM calls waited for a slot.")
+LLM_ADMISSION_REJECTIONS = CounterMetric(
+    "llm_admission_rejections_total", "LLM-bound requests turned away with 429.", ("reason",))
+
+METRICS = [
+    HTTP_REQUEST_SECONDS, HTTP_IN_FLIGHT, MONGO_COMMAND_SECONDS, LLM_REQUEST_SECONDS,
+    LLM_FIRST_CHUNK_SECONDS, LLM_PROMPT_CHARS, LLM_RESPONSE_CHARS, DECK_STAGE_SECONDS, AUTH_SERVICE_REQUESTS,
+    LLM_QUEUE_DEPTH, LLM_ACTIVE, LLM_QUEUE_WAIT_SECONDS, LLM_ADMISSION_REJECTIONS,
+]
+
+def render_metrics(extra: list = ()) -> str:
+    lines = []
+    for metric in list(METRICS) + list(extra):
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command. Called from Motor's executor threads."""
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        if not isinstance(collection, str):
+            collection = ""
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (collection, event.command_name)
+
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            collection, command = self._pending.pop((event.connection_id, event.request_id), ("", event.command_name))
+        MONGO_COMMAND_SECONDS.observe(collection, command, outcome, value=event.duration_micros / 1_000_000)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=[MongoCommandMetrics()])
 db = client[os.environ['DB_NAME']]
 
+# Strong references to fire-and-forget tasks so they aren't garbage collected
+background_tasks = set()
+
+def spawn_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def run_periodically(interval: float, job, description: str, immediately: bool = False):
+    """Await ``job()`` every ``interval`` seconds until cancelled; failures are logged."""
+    if not immediately:
+        await asyncio.sleep(interval)
+    while True:
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Could not {description}")
+        await asyncio.sleep(interval)
+
+# Index declarations, reconciled against the database on startup
+INDEX_SPECS = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "user_sessions": [
+        IndexModel([("session_token", ASCENDING)], name="session_token_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        # Reaps sessions once expires_at has passed (only applies to BSON dates)
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "clients": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="user_id_created_at"),
+    ],
+    "leads": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id"),
+        IndexModel([("user_id", ASCENDING), ("client_id", ASCENDING)], name="user_id_client_id"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="user_id_created_at"),
+    ],
+    "assets": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id"),
+        IndexModel([("user_id", ASCENDING), ("type", ASCENDING), ("created_at", DESCENDING)], name="user_id_type_created_at"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="user_id_created_at"),
+        IndexModel([("extraction_status", ASCENDING)], name="extraction_status"),
+    ],
+    "deck_jobs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_id_created_at"),
+    ],
+    "llm_cache": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        IndexModel([("last_hit_at", ASCENDING)], name="last_hit_at"),
+    ],
+    "deck_exports": [
+        IndexModel([("deck_id", ASCENDING), ("format", ASCENDING), ("content_hash", ASCENDING)], name="deck_format_hash_unique", unique=True),
+    ],
+    "sales_decks": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id"),
+        IndexModel([("user_id", ASCENDING), ("lead_id", ASCENDING), ("created_at", DESCENDING)], name="user_id_lead_id_created_at"),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="user_id_created_at"),
+    ],
+}
+
+INDEX_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+# collection -> index name -> {"state": ..., "error": ...}
+index_status = {}
+
+def _index_matches(existing: dict, spec: dict) -> bool:
+    if [tuple(k) for k in existing['key']] != list(spec['key'].items()):
+        return False
+    return all(existing.get(option) == spec.get(option) for option in INDEX_OPTIONS)
+
+def _only_ttl_differs(existing: dict, spec: dict) -> bool:
+    if 'expireAfterSeconds' not in existing or 'expireAfterSeconds' not in spec:
+        return False
+    if [tuple(k) for k in existing['key']] != list(spec['key'].items()):
+        return False
+    return all(existing.get(option) == spec.get(option) for option in INDEX_OPTIONS if option != 'expireAfterSeconds')
+
+async def ensure_indexes():
+    for collection_name, specs in INDEX_SPECS.items():
+        index_status[collection_name] = {spec.document['name']: {"state": "pending", "error": None} for spec in specs}
+    
+    for collection_name, specs in INDEX_SPECS.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        
+        for spec in specs:
+            doc = spec.document
+            name = doc['name']
+            status = index_status[collection_name][name]
+            current = existing.get(name)
+            status["state"] = "building"
+            try:
+                if current is None:
+                    await collection.create_indexes([spec])
+                    status["state"] = "created"
+                elif _index_matches(current, doc):
+                    status["state"] = "ok"
+                elif _only_ttl_differs(current, doc):
+                    await db.command({
+                        "collMod": collection_name,
+                        "index": {"name": name, "expireAfterSeconds": doc['expireAfterSeconds']}
+                    })
+                    status["state"] = "updated"
+                else:
+                    await collection.drop_index(name)
+                    await collection.create_indexes([spec])
+                    status["state"] = "rebuilt"
+            except OperationFailure as e:
+                status["state"] = "failed"
+                status["error"] = str(e)
+                logger.error(f"Index {collection_name}.{name} failed: {e}")
+    
+    failed = [f"{c}.{n}" for c, indexes in index_status.items() for n, st in indexes.items() if st["state"] == "failed"]
+    if failed:
+        logger.warning(f"Index bootstrap finished with failures: {', '.join(failed)}")
+    else:
+        logger.info("Index bootstrap finished")
+
+# Timestamp fields that older documents may still hold as ISO-8601 strings
+TIMESTAMP_FIELDS = {
+    "users": ["created_at"],
+    "user_sessions": ["expires_at", "created_at"],
+    "clients": ["created_at"],
+    "leads": ["created_at"],
+    "assets": ["created_at"],
+    "sales_decks": ["created_at"],
+}
+
+async def migrate_timestamps(batch_size: int = 500):
+    """Convert string timestamps to BSON dates in place.
+
+    Batches walk each collection in ``_id`` order and checkpoint the last
+    processed ``_id`` in the ``migrations`` collection, so an interrupted run
+    resumes where it stopped. Each update is conditional on the field still
+    holding the original string, so concurrent writes are never clobbered.
+    """
+    for collection_name, fields in TIMESTAMP_FIELDS.items():
+        collection = db[collection_name]
+        for field in fields:
+            migration_id = f"timestamps:{collection_name}.{field}"
+            state = await db.migrations.find_one({"_id": migration_id}) or {}
+            if state.get("done"):
+                continue
+            
+            last_id = state.get("last_id")
+            converted = state.get("converted", 0)
+            failed = state.get("failed", 0)
+            
+            while True:
+                query = {field: {"$type": "string"}}
+                if last_id is not None:
+                    query["_id"] = {"$gt": last_id}
+                batch = await collection.find(query, {field: 1}).sort("_id", ASCENDING).limit(batch_size).to_list(batch_size)
+                if not batch:
+                    break
+                
+                operations = []
+                for doc in batch:
+                    try:
+                        value = _as_utc(doc[field])
+                    except ValueError:
+                        failed += 1
+                        continue
+                    operations.append(UpdateOne({"_id": doc["_id"], field: doc[field]}, {"$set": {field: value}}))
+                
+                if operations:
+                    result = await collection.bulk_write(operations, ordered=False)
+                    converted += result.modified_count
+                
+                last_id = batch[-1]["_id"]
+                await db.migrations.update_one(
+                    {"_id": migration_id},
+                    {"$set": {"last_id": last_id, "converted": converted, "failed": failed, "updated_at": datetime.now(timezone.utc)}},
+                    upsert=True
+                )
+                # Yield between batches so the migration stays online
+                await asyncio.sleep(0)
+            
+            await db.migrations.update_one(
+                {"_id": migration_id},
+                {"$set": {"done": True, "converted": converted, "failed": failed, "updated_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+            logger.info(f"Migrated {converted} {collection_name}.{field} timestamps ({failed} unparseable)")
+
+async def migrate_asset_blobs(batch_size: int = 50):
+    """Move legacy base64 ``file_data`` payloads out of asset documents into the blob store."""
+    moved = 0
+    while True:
+        batch = await db.assets.find(
+            {"file_data": {"$type": "string"}},
+            {"_id": 1, "file_data": 1}
+        ).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        
+        for doc in batch:
+            try:
+                data = base64.b64decode(doc['file_data'])
+            except ValueError:
+                # Keep the payload but take it out of the migration's way
+                await db.assets.update_one({"_id": doc['_id']}, {"$rename": {"file_data": "file_data_unreadable"}})
+                continue
+            sha256, size = await blob_store.put(_single_chunk(data))
+            result = await db.assets.update_one(
+                {"_id": doc['_id'], "file_data": doc['file_data']},
+                {"$set": {"blob_sha256": sha256, "file_size": size}, "$unset": {"file_data": ""}}
+            )
+            if result.modified_count:
+                moved += 1
+            else:
+                await blob_store.release(sha256)
+        await asyncio.sleep(0)
+    
+    if moved:
+        logger.info(f"Moved {moved} asset payloads into the {blob_store.name} blob store")
+
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -71,16 +462,47 @@ class Asset(BaseModel):
     name: str
     content: str
     file_url: Optional[str] = None
-    file_data: Optional[str] = None  # Base64 encoded file
     file_name: Optional[str] = None
+    blob_sha256: Optional[str] = None  # Key into the blob store
+    file_size: Optional[int] = None
+    content_type: Optional[str] = None
+    extraction_status: Optional[str] = None  # "pending", "running", "done", "failed", "unsupported"
+    extraction_error: Optional[str] = None
+    digest: Optional[str] = None  # Compact summary used in deck prompts
+    digest_hash: Optional[str] = None  # SHA-256 of the content the digest was built from
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class AssetSummary(BaseModel):
+    """Asset as returned by the list route, where heavy fields are opt-in."""
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    user_id: Optional[str] = None
+    type: Optional[str] = None
+    name: Optional[str] = None
+    content: Optional[str] = None
+    content_preview: Optional[str] = None
+    file_url: Optional[str] = None
+    file_name: Optional[str] = None
+    blob_sha256: Optional[str] = None
+    file_size: Optional[int] = None
+    content_type: Optional[str] = None
+    extraction_status: Optional[str] = None
+    extraction_error: Optional[str] = None
+    digest: Optional[str] = None
+    created_at: datetime
+
 class AssetCreate(BaseModel):
     type: str
     name: str
     content: str
     file_url: Optional[str] = None
 
+class AssetUpdate(BaseModel):
+    type: Optional[str] = None
+    name: Optional[str] = None
+    content: Optional[str] = None
+    file_url: Optional[str] = None
+
 class Lead(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -103,6 +525,25 @@ class LeadUpdate(BaseModel):
     notes: Optional[str] = None
     status: Optional[str] = None
 
+class BulkOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[str] = None  # Target of an update or delete
+    data: Optional[dict] = None  # Create or update fields, validated per item
+
+class BulkRequest(BaseModel):
+    operations: List[BulkOperation] = Field(min_length=1, max_length=int(os.environ.get('BULK_MAX_OPERATIONS', '1000')))
+
+class BulkItemResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[str] = None
+    status: str = "pending"  # created, updated, deleted, not_found, invalid, failed
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
+    counts: Dict[str, int]  # status -> number of items
+
 class SalesDeck(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -110,10 +551,514 @@ class SalesDeck(BaseModel):
     lead_id: str
     lead_name: str
     content: dict
+    version: int = 1  # Bumped on every in-place edit
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class SlideRegenerateRequest(BaseModel):
+    instructions: Optional[str] = Field(None, max_length=2000)  # e.g. "shorter, focus on cost"
+
 class DeckGenerateRequest(BaseModel):
     lead_id: str
+    force_refresh: bool = False  # Bypass the LLM response cache
+
+class DeckBatchRequest(BaseModel):
+    lead_ids: List[str] = Field(min_length=1, max_length=int(os.environ.get('DECK_BATCH_MAX_LEADS', '200')))
+    force_refresh: bool = False
+
+class DeckBatchResult(BaseModel):
+    lead_id: str
+    status: str = "queued"  # queued, succeeded, failed
+    deck_id: Optional[str] = None
+    error: Optional[str] = None
+
+class DeckJob(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str
+    kind: str = "single"  # single, batch
+    lead_id: Optional[str] = None
+    lead_ids: Optional[List[str]] = None
+    results: Optional[List[DeckBatchResult]] = None
+    force_refresh: bool = False
+    status: str = "queued"  # queued, running, succeeded, failed
+    deck_id: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class DashboardDeck(BaseModel):
+    id: str
+    title: Optional[str] = None
+    created_at: datetime
+
+class DashboardClient(BaseModel):
+    id: str
+    name: str
+    industry: str
+    lead_counts: Dict[str, int] = {}  # status -> count
+    lead_total: int = 0
+
+class DashboardLead(BaseModel):
+    id: str
+    client_id: str
+    client_name: str
+    status: str
+    created_at: datetime
+    latest_deck: Optional[DashboardDeck] = None
+
+class Dashboard(BaseModel):
+    clients: List[DashboardClient] = []
+    leads: List[DashboardLead] = []
+    asset_counts: Dict[str, int] = {}  # asset type -> count
+    deck_total: int = 0
+
+# Blob storage
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', str(1024 * 1024)))
+MAX_INLINE_TEXT_BYTES = int(os.environ.get('MAX_INLINE_TEXT_BYTES', str(2 * 1024 * 1024)))
+
+class BlobStore:
+    """Content-addressed blob storage keyed by SHA-256.
+
+    The ``blobs`` collection holds one document per distinct content hash with
+    a reference count and the backend-specific ``ref`` of the stored bytes, so
+    identical uploads from any user share a single copy. Backends only need to
+    stage, commit, read and delete raw bytes.
+    """
+    name = "base"
+
+    async def put(self, chunks) -> tuple:
+        """Store an async iterable of byte chunks and return ``(sha256, size)``."""
+        staging, sha256, size = await self._write_staged(chunks)
+        
+        existing = await db.blobs.find_one_and_update({"_id": sha256}, {"$inc": {"refcount": 1}})
+        if existing:
+            await self._discard(staging)
+            return sha256, size
+        
+        ref = await self._commit(staging, sha256)
+        try:
+            await db.blobs.insert_one({
+                "_id": sha256,
+                "ref": ref,
+                "size": size,
+                "backend": self.name,
+                "refcount": 1,
+                "created_at": datetime.now(timezone.utc)
+            })
+        except DuplicateKeyError:
+            # Another upload of the same bytes committed first; share its copy
+            await db.blobs.update_one({"_id": sha256}, {"$inc": {"refcount": 1}})
+            await self._delete(ref)
+        return sha256, size
+
+    async def release(self, sha256: str):
+        blob = await db.blobs.find_one_and_update(
+            {"_id": sha256},
+            {"$inc": {"refcount": -1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if blob and blob['refcount'] <= 0:
+            result = await db.blobs.delete_one({"_id": sha256, "refcount": {"$lte": 0}})
+            if result.deleted_count:
+                await self._delete(blob['ref'])
+
+    async def open(self, sha256: str, start: int = 0, end: Optional[int] = None):
+        """Yield the bytes of ``sha256`` from ``start`` up to and including ``end``."""
+        blob = await db.blobs.find_one({"_id": sha256})
+        if not blob:
+            raise FileNotFoundError(sha256)
+        if end is None:
+            end = blob['size'] - 1
+        async for chunk in self._read(blob['ref'], start, end - start + 1):
+            yield chunk
+
+    async def _write_staged(self, chunks) -> tuple:
+        raise NotImplementedError
+
+    async def _commit(self, staging, sha256: str):
+        raise NotImplementedError
+
+    async def _discard(self, staging):
+        raise NotImplementedError
+
+    async def _delete(self, ref):
+        raise NotImplementedError
+
+    async def _read(self, ref, start: int, length: int):
+        raise NotImplementedError
+        yield
+
+class GridFSBlobStore(BlobStore):
+    name = "gridfs"
+
+    def __init__(self, database, bucket_name: str = "blobs"):
+        self.bucket = AsyncIOMotorGridFSBucket(database, bucket_name=bucket_name)
+
+    async def _write_staged(self, chunks) -> tuple:
+        hasher = hashlib.sha256()
+        size = 0
+        grid_in = self.bucket.open_upload_stream(f"staging-{uuid.uuid4()}")
+        try:
+            async for chunk in chunks:
+                hasher.update(chunk)
+                size += len(chunk)
+                await grid_in.write(chunk)
+            await grid_in.close()
+        except BaseException:
+            await grid_in.abort()
+            raise
+        return grid_in._id, hasher.hexdigest(), size
+
+    async def _commit(self, staging, sha256: str):
+        await self.bucket.rename(staging, sha256)
+        return staging
+
+    async def _discard(self, staging):
+        await self._delete(staging)
+
+    async def _delete(self, ref):
+        try:
+            await self.bucket.delete(ref)
+        except NoFile:
+            pass
+
+    async def _read(self, ref, start: int, length: int):
+        grid_out = await self.bucket.open_download_stream(ref)
+        grid_out.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await grid_out.read(min(UPLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+class FilesystemBlobStore(BlobStore):
+    name = "filesystem"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        (self.root / "staging").mkdir(parents=True, exist_ok=True)
+
+    async def _write_staged(self, chunks) -> tuple:
+        hasher = hashlib.sha256()
+        size = 0
+        staging = self.root / "staging" / str(uuid.uuid4())
+        handle = await asyncio.to_thread(open, staging, "wb")
+        try:
+            async for chunk in chunks:
+                hasher.update(chunk)
+                size += len(chunk)
+                await asyncio.to_thread(handle.write, chunk)
+        except BaseException:
+            await asyncio.to_thread(handle.close)
+            await asyncio.to_thread(staging.unlink, True)
+            raise
+        await asyncio.to_thread(handle.close)
+        return staging, hasher.hexdigest(), size
+
+    async def _commit(self, staging, sha256: str):
+        # Each commit gets its own file so a concurrent release can never
+        # delete bytes another upload of the same hash just committed
+        ref = f"{sha256[:2]}/{sha256}.{uuid.uuid4().hex[:8]}"
+        target = self.root / ref
+        await asyncio.to_thread(target.parent.mkdir, parents=True, exist_ok=True)
+        await asyncio.to_thread(shutil.move, str(staging), str(target))
+        return ref
+
+    async def _discard(self, staging):
+        await asyncio.to_thread(Path(staging).unlink, True)
+
+    async def _delete(self, ref):
+        await asyncio.to_thread((self.root / ref).unlink, True)
+
+    async def _read(self, ref, start: int, length: int):
+        handle = await asyncio.to_thread(open, self.root / ref, "rb")
+        try:
+            await asyncio.to_thread(handle.seek, start)
+            remaining = length
+            while remaining > 0:
+                chunk = await asyncio.to_thread(handle.read, min(UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(handle.close)
+
+if os.environ.get('BLOB_STORE', 'gridfs') == 'filesystem':
+    blob_store = FilesystemBlobStore(Path(os.environ.get('BLOB_STORE_PATH', str(ROOT_DIR / 'blobs'))))
+else:
+    blob_store = GridFSBlobStore(db)
+
+class TextSniffer:
+    """Incrementally decodes upload chunks as UTF-8 until they prove binary."""
+
+    def __init__(self, max_bytes: int = MAX_INLINE_TEXT_BYTES):
+        self.max_bytes = max_bytes
+        self.is_text = True
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._parts = []
+        self._seen = 0
+
+    def feed(self, chunk: bytes):
+        if not self.is_text or self._seen >= self.max_bytes:
+            return
+        chunk = chunk[:self.max_bytes - self._seen]
+        self._seen += len(chunk)
+        try:
+            self._parts.append(self._decoder.decode(chunk))
+        except UnicodeDecodeError:
+            self.is_text = False
+            self._parts = []
+
+    def text(self) -> Optional[str]:
+        if not self.is_text:
+            return None
+        # When truncated, a multi-byte sequence split at the cut is dropped
+        if self._seen < self.max_bytes:
+            try:
+                self._parts.append(self._decoder.decode(b"", final=True))
+            except UnicodeDecodeError:
+                return None
+        return "".join(self._parts)
+
+async def iter_upload(file: UploadFile, sniffer: Optional[TextSniffer] = None):
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if sniffer:
+            sniffer.feed(chunk)
+        yield chunk
+
+async def _single_chunk(data: bytes):
+    yield data
+
+# Text extraction
+EXTRACTION_WORKERS = int(os.environ.get('EXTRACTION_WORKERS', '2'))
+MAX_EXTRACTION_BYTES = int(os.environ.get('MAX_EXTRACTION_BYTES', str(50 * 1024 * 1024)))
+STALE_EXTRACTION_SECONDS = int(os.environ.get('STALE_EXTRACTION_SECONDS', '600'))
+EXTRACTION_SWEEP_SECONDS = float(os.environ.get('EXTRACTION_SWEEP_SECONDS', '60'))
+# Forking a process that runs an event loop and Mongo client threads can deadlock
+# the child, so workers start from a clean interpreter instead
+EXTRACTION_START_METHOD = os.environ.get(
+    'EXTRACTION_START_METHOD',
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+class UnsupportedFormat(Exception):
+    pass
+
+class _HTMLTextParser(HTMLParser):
+    SKIP_TAGS = {"script", "style", "noscript", "template"}
+    BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+def _extract_pdf(data: bytes) -> str:
+    from pypdf import PdfReader
+    reader = PdfReader(io.BytesIO(data))
+    return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+
+def _extract_docx(data: bytes) -> str:
+    import docx
+    document = docx.Document(io.BytesIO(data))
+    parts = [paragraph.text for paragraph in document.paragraphs]
+    for table in document.tables:
+        for row in table.rows:
+            parts.append(" | ".join(cell.text for cell in row.cells))
+    return "\n".join(parts)
+
+def _extract_pptx(data: bytes) -> str:
+    from pptx import Presentation
+    presentation = Presentation(io.BytesIO(data))
+    slides = []
+    for slide in presentation.slides:
+        texts = [shape.text_frame.text for shape in slide.shapes if shape.has_text_frame]
+        slides.append("\n".join(t for t in texts if t))
+    return "\n\n".join(slides)
+
+def _extract_html(data: bytes) -> str:
+    parser = _HTMLTextParser()
+    parser.feed(data.decode('utf-8', errors='replace'))
+    parser.close()
+    return re.sub(r"\n\s*\n+", "\n\n", "".join(parser.parts)).strip()
+
+EXTRACTORS = {
+    ".pdf": _extract_pdf,
+    ".docx": _extract_docx,
+    ".pptx": _extract_pptx,
+    ".html": _extract_html,
+    ".htm": _extract_html,
+}
+
+EXTRACTOR_CONTENT_TYPES = {
+    "application/pdf": ".pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": ".pptx",
+    "text/html": ".html",
+}
+
+def extractor_suffix(file_name: Optional[str], content_type: Optional[str]) -> str:
+    """The EXTRACTORS key for a file, by extension first and then content type."""
+    suffix = Path(file_name or "").suffix.lower()
+    if suffix not in EXTRACTORS:
+        suffix = EXTRACTOR_CONTENT_TYPES.get((content_type or "").split(';')[0].strip(), suffix)
+    return suffix
+
+def extract_text(data: bytes, file_name: Optional[str], content_type: Optional[str]) -> str:
+    """Parse a document into plain text. Runs inside the process pool."""
+    extractor = EXTRACTORS.get(extractor_suffix(file_name, content_type))
+    if extractor is None:
+        raise UnsupportedFormat(f"No extractor for {file_name or content_type}")
+    return extractor(data).strip()
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=EXTRACTION_WORKERS, mp_context=multiprocessing.get_context(EXTRACTION_START_METHOD)
+        )
+    return _process_pool
+
+# Bounds how many blobs are buffered in memory waiting for a pool worker
+_extraction_slots = asyncio.Semaphore(EXTRACTION_WORKERS * 2)
+
+async def run_extraction(asset_id: str):
+    claimed = await db.assets.find_one_and_update(
+        {"id": asset_id, "extraction_status": "pending"},
+        {"$set": {"extraction_status": "running", "extraction_started_at": datetime.now(timezone.utc)}},
+        {"_id": 0, "user_id": 1, "type": 1, "blob_sha256": 1, "file_name": 1, "content_type": 1, "file_size": 1}
+    )
+    if not claimed:
+        return
+    
+    update = {}
+    async with _extraction_slots:
+        try:
+            if (claimed.get('file_size') or 0) > MAX_EXTRACTION_BYTES:
+                raise UnsupportedFormat(f"File exceeds {MAX_EXTRACTION_BYTES} bytes")
+            data = b"".join([chunk async for chunk in blob_store.open(claimed['blob_sha256'])])
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(
+                get_process_pool(), extract_text, data, claimed.get('file_name'), claimed.get('content_type')
+            )
+            update = {"content": text, "extraction_status": "done", "extraction_error": None}
+        except UnsupportedFormat as e:
+            update = {"extraction_status": "unsupported", "extraction_error": str(e)}
+        except Exception as e:
+            logger.exception(f"Text extraction failed for asset {asset_id}")
+            update = {"extraction_status": "failed", "extraction_error": f"{type(e).__name__}: {e}"}
+    
+    result = await db.assets.update_one(
+        {"id": asset_id, "extraction_status": "running"},
+        {"$set": update, "$unset": {"extraction_started_at": ""}}
+    )
+    if result.modified_count and update.get("extraction_status") == "done":
+        asset_indexes.on_asset_saved(claimed['user_id'], {"id": asset_id, "type": claimed['type'], "content": update['content']})
+        await refresh_digest(asset_id)
+
+async def requeue_stale_extractions():
+    # Work claimed by a worker that died never finishes; hand it back out
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=STALE_EXTRACTION_SECONDS)
+    stale = {"extraction_status": "running", "extraction_started_at": {"$lt": stale_before}}
+    async for asset in db.assets.find(stale, {"_id": 0, "id": 1}):
+        result = await db.assets.update_one({**stale, "id": asset['id']}, {"$set": {"extraction_status": "pending"}})
+        if result.modified_count:
+            spawn_background(run_extraction(asset['id']))
+
+async def resume_extractions():
+    await requeue_stale_extractions()
+    async for asset in db.assets.find({"extraction_status": "pending"}, {"_id": 0, "id": 1}):
+        spawn_background(run_extraction(asset['id']))
+
+# Session cache
+class SessionCache:
+    """Bounded TTL+LRU cache of resolved session tokens.
+
+    Entries map a session token to the resolved ``User`` and the instant the
+    entry stops being servable, which is never later than the session's own
+    ``expires_at``.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 60.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, token: str) -> Optional["User"]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, session_expires_at, cached_until = entry
+        now = datetime.now(timezone.utc)
+        if now >= session_expires_at or time.monotonic() >= cached_until:
+            del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return user
+
+    def put(self, token: str, user: "User", session_expires_at: datetime):
+        if self.max_size <= 0:
+            return
+        self._entries[token] = (user, session_expires_at, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, token: str):
+        self._entries.pop(token, None)
+
+    def invalidate_user(self, user_id: str):
+        for token in [t for t, entry in self._entries.items() if entry[0].id == user_id]:
+            del self._entries[token]
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+session_cache = SessionCache(
+    max_size=int(os.environ.get('SESSION_CACHE_SIZE', '10000')),
+    ttl_seconds=float(os.environ.get('SESSION_CACHE_TTL_SECONDS', '60'))
+)
+
+def _as_utc(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
 
 # Authentication helper
 async def get_current_user(session_token: Optional[str] = Cookie(None), authorization: Optional[str] = Header(None)) -> User:
@@ -125,56 +1070,322 @@ async def get_current_user(session_token: Optional[str] = Cookie(None), authoriz
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
+    cached_user = session_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    
     session = await db.user_sessions.find_one({"session_token": token})
     if not session:
         raise HTTPException(status_code=401, detail="Invalid session")
     
-    if datetime.fromisoformat(session['expires_at']) < datetime.now(timezone.utc):
+    expires_at = _as_utc(session['expires_at'])
+    if expires_at < datetime.now(timezone.utc):
         raise HTTPException(status_code=401, detail="Session expired")
     
     user = await db.users.find_one({"id": session['user_id']}, {"_id": 0})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    if isinstance(user['created_at'], str):
-        user['created_at'] = datetime.fromisoformat(user['created_at'])
-    
-    return User(**user)
+    current_user = User(**user)
+    session_cache.put(token, current_user, expires_at)
+    return current_user
+
+# Pagination helpers
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', '100'))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '1000'))
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(doc: dict) -> str:
+    payload = json.dumps({"c": _as_utc(doc['created_at']).isoformat(), "i": doc['id']})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return _as_utc(payload['c']), str(payload['i'])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def after_cursor(cursor: str) -> dict:
+    """Query for documents after ``cursor`` in (created_at, id) descending order."""
+    created_at, doc_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": doc_id}},
+        ]
+    }
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get('accept', '')
+
+def model_projection(model) -> dict:
+    # Only fields the model declares, so unvalidated documents can't leak extras
+    return {"_id": 0, **{name: 1 for name in model.model_fields}}
+
+async def _stream_ndjson(cursor):
+    async for doc in cursor:
+        yield orjson.dumps(doc) + b"\n"
+
+async def paginate(request: Request, collection, query: dict, model,
+                   limit: Optional[int], cursor: Optional[str], projection: Optional[dict] = None):
+    """List documents newest first using a keyset on (created_at, id).
+
+    JSON callers get one page and an ``X-Next-Cursor`` header when more
+    documents remain. NDJSON callers get every remaining document streamed
+    straight off the Motor cursor, unless ``limit`` is given explicitly.
+
+    Documents are written by this app, so they are projected to ``model``'s
+    fields and encoded with orjson as-is; the route's ``response_model`` only
+    documents the shape and is bypassed by returning a response directly.
+    """
+    if cursor:
+        query = {**query, **after_cursor(cursor)}
+    
+    find = collection.find(query, projection or model_projection(model)).sort([("created_at", DESCENDING), ("id", DESCENDING)])
+    
+    if wants_ndjson(request):
+        if limit:
+            find = find.limit(limit)
+        return StreamingResponse(_stream_ndjson(find.batch_size(DEFAULT_PAGE_SIZE)), media_type=NDJSON_MEDIA_TYPE)
+    
+    page_size = limit or DEFAULT_PAGE_SIZE
+    docs = await find.limit(page_size + 1).to_list(page_size + 1)
+    headers = {}
+    if len(docs) > page_size:
+        docs = docs[:page_size]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(docs[-1])
+    return ORJSONResponse(docs, headers=headers)
+
+# Bulk writes
+BULK_SUCCESS_STATUS = {"create": "created", "update": "updated", "delete": "deleted"}
+
+class BulkPlan:
+    """Validates a batch of mixed operations into one unordered bulk_write.
+
+    Items that fail validation or target a missing document are reported
+    without being sent; the rest succeed or fail individually.
+    """
+
+    def __init__(self, collection, user_id: str, operations: List[BulkOperation]):
+        self.collection = collection
+        self.user_id = user_id
+        self.operations = operations
+        self.results = [BulkItemResult(index=n, op=op.op, id=op.id) for n, op in enumerate(operations)]
+        self.targets = {}  # id -> existing document, for updates and deletes
+        self.requests = []
+        self.positions = []  # bulk_write position -> item index
+        self.deleted_count = 0
+
+    async def load_targets(self, projection: dict):
+        ids = list({op.id for op in self.operations if op.op != "create" and op.id})
+        if ids:
+            cursor = self.collection.find({"user_id": self.user_id, "id": {"$in": ids}}, {"_id": 0, "id": 1, **projection})
+            self.targets = {doc['id']: doc async for doc in cursor}
+
+    def reject(self, index: int, status: str, error: str):
+        self.results[index].status = status
+        self.results[index].error = error
+
+    def validate(self, index: int, model):
+        try:
+            return model(**(self.operations[index].data or {}))
+        except ValidationError as e:
+            self.reject(index, "invalid", "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+            ))
+            return None
+
+    def target(self, index: int) -> Optional[dict]:
+        operation = self.operations[index]
+        if not operation.id:
+            self.reject(index, "invalid", "id is required")
+            return None
+        doc = self.targets.get(operation.id)
+        if doc is None:
+            self.reject(index, "not_found", "Not found")
+        return doc
+
+    def _add(self, index: int, request):
+        self.requests.append(request)
+        self.positions.append(index)
+
+    def insert(self, index: int, doc: dict):
+        self.results[index].id = doc['id']
+        self._add(index, InsertOne(doc))
+
+    def update(self, index: int, fields: dict):
+        self._add(index, UpdateOne({"id": self.operations[index].id, "user_id": self.user_id}, {"$set": fields}))
+
+    def delete(self, index: int):
+        self._add(index, DeleteOne({"id": self.operations[index].id, "user_id": self.user_id}))
+
+    async def execute(self) -> BulkResult:
+        failed = set()
+        if self.requests:
+            try:
+                result = await self.collection.bulk_write(self.requests, ordered=False)
+                self.deleted_count = result.deleted_count
+            except BulkWriteError as e:
+                self.deleted_count = e.details.get('nRemoved', 0)
+                for error in e.details.get('writeErrors', []):
+                    failed.add(error['index'])
+                    self.reject(self.positions[error['index']], "failed", error.get('errmsg', "Write failed"))
+        for position, index in enumerate(self.positions):
+            if position not in failed:
+                self.results[index].status = BULK_SUCCESS_STATUS[self.operations[index].op]
+        counts = Counter(item.status for item in self.results)
+        return BulkResult(results=self.results, counts=dict(counts))
+
+    def succeeded(self, op: str) -> List[int]:
+        return [n for n, item in enumerate(self.results) if item.status == BULK_SUCCESS_STATUS[op]]
+
+def changed_fields(model: BaseModel) -> dict:
+    return {k: v for k, v in model.model_dump().items() if v is not None}
+
+# Auth service client
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures, probing again after a cool-down."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def retry_after(self) -> int:
+        if self.opened_at is None:
+            return 0
+        return max(1, math.ceil(self.reset_seconds - (time.monotonic() - self.opened_at)))
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "half_open":
+            # Let one probe through and re-arm the timer; if the probe never
+            # reports back, another is allowed after the next cool-down
+            self.opened_at = time.monotonic()
+            return True
+        return state == "closed"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+class AuthServiceClient:
+    """Application-scoped, pooled client for the OAuth session-data exchange.
+
+    Timeouts, transport errors, 429s and 5xxs are retried with jittered
+    exponential backoff; once the retries are exhausted the failure counts
+    toward the circuit breaker, which turns later logins into an immediate 503
+    instead of piling more requests onto a struggling auth service.
+    """
+
+    def __init__(self):
+        self.url = os.environ.get('AUTH_SESSION_DATA_URL', "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data")
+        self.retries = int(os.environ.get('AUTH_MAX_RETRIES', '2'))
+        self.backoff_seconds = float(os.environ.get('AUTH_RETRY_BACKOFF_SECONDS', '0.2'))
+        self.timeout = httpx.Timeout(
+            float(os.environ.get('AUTH_READ_TIMEOUT_SECONDS', '10')),
+            connect=float(os.environ.get('AUTH_CONNECT_TIMEOUT_SECONDS', '3'))
+        )
+        self.limits = httpx.Limits(
+            max_connections=int(os.environ.get('AUTH_MAX_CONNECTIONS', '50')),
+            max_keepalive_connections=int(os.environ.get('AUTH_MAX_KEEPALIVE_CONNECTIONS', '10')),
+            keepalive_expiry=30
+        )
+        self.breaker = CircuitBreaker(
+            int(os.environ.get('AUTH_BREAKER_FAILURES', '5')),
+            float(os.environ.get('AUTH_BREAKER_RESET_SECONDS', '30'))
+        )
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _unavailable(self) -> HTTPException:
+        return HTTPException(
+            status_code=503,
+            detail="Authentication service unavailable",
+            headers={"Retry-After": str(self.breaker.retry_after() or 1)}
+        )
+
+    async def fetch_session_data(self, session_id: str) -> dict:
+        if not self.breaker.allow():
+            AUTH_SERVICE_REQUESTS.inc("rejected")
+            raise self._unavailable()
+        
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff_seconds * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            try:
+                auth_response = await self.client.get(self.url, headers={"X-Session-ID": session_id})
+            except httpx.HTTPError as e:
+                logger.warning(f"Auth service request failed (attempt {attempt + 1}): {e!r}")
+                continue
+            if auth_response.status_code == 429 or auth_response.status_code >= 500:
+                logger.warning(f"Auth service returned {auth_response.status_code} (attempt {attempt + 1})")
+                continue
+            
+            # The service answered; a rejected session id isn't an outage
+            self.breaker.record_success()
+            if auth_response.status_code != 200:
+                AUTH_SERVICE_REQUESTS.inc("invalid")
+                logger.error(f"Auth service returned {auth_response.status_code}")
+                raise HTTPException(status_code=400, detail="Invalid session ID")
+            AUTH_SERVICE_REQUESTS.inc("ok")
+            return auth_response.json()
+        
+        self.breaker.record_failure()
+        AUTH_SERVICE_REQUESTS.inc("failed")
+        raise self._unavailable()
+
+auth_service = AuthServiceClient()
 
 # Auth Routes
 @api_router.post("/auth/session")
 async def create_session(response: Response, session_id: str = Form(...)):
-    import httpx
-    
     logger.info(f"Creating session for session_id: {session_id[:20]}...")
     
-    async with httpx.AsyncClient() as client:
-        auth_response = await client.get(
-            "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
-            headers={"X-Session-ID": session_id}
-        )
-        
-        if auth_response.status_code != 200:
-            logger.error(f"Auth service returned {auth_response.status_code}")
-            raise HTTPException(status_code=400, detail="Invalid session ID")
-        
-        user_data = auth_response.json()
-        logger.info(f"User data retrieved: {user_data.get('email')}")
-    
-    # Check if user exists
-    existing_user = await db.users.find_one({"email": user_data['email']}, {"_id": 0})
-    
-    if not existing_user:
-        logger.info(f"Creating new user: {user_data['email']}")
-        user = User(
-            id=user_data['id'],
-            email=user_data['email'],
-            name=user_data['name'],
-            picture=user_data['picture']
-        )
-        user_dict = user.model_dump()
-        user_dict['created_at'] = user_dict['created_at'].isoformat()
-        await db.users.insert_one(user_dict)
+    user_data = await auth_service.fetch_session_data(session_id)
+    logger.info(f"User data retrieved: {user_data.get('email')}")
+    
+    # Create the user on first login; upserts keep a repeated exchange of the same
+    # session_id (React StrictMode runs the login effect twice, clients retry) from
+    # tripping the unique indexes
+    user = User(
+        id=user_data['id'],
+        email=user_data['email'],
+        name=user_data['name'],
+        picture=user_data['picture']
+    )
+    result = await db.users.update_one(
+        {"email": user_data['email']},
+        {"$setOnInsert": user.model_dump()},
+        upsert=True
+    )
+    if result.upserted_id is not None:
+        logger.info(f"Created new user: {user_data['email']}")
     else:
         logger.info(f"Existing user found: {user_data['email']}")
     
@@ -188,11 +1399,16 @@ async def create_session(response: Response, session_id: str = Form(...)):
         expires_at=expires_at
     )
     
-    session_dict = session.model_dump()
-    session_dict['expires_at'] = session_dict['expires_at'].isoformat()
-    session_dict['created_at'] = session_dict['created_at'].isoformat()
-    
-    await db.user_sessions.insert_one(session_dict)
+    await db.user_sessions.update_one(
+        {"session_token": session_token},
+        {
+            "$set": {"user_id": session.user_id, "expires_at": session.expires_at},
+            "$setOnInsert": {"created_at": session.created_at}
+        },
+        upsert=True
+    )
+    session_cache.invalidate(session_token)
+    session_cache.invalidate_user(user_data['id'])
     logger.info(f"Session created successfully for user: {user_data['email']}")
     
     # Set cookie
@@ -217,6 +1433,7 @@ async def get_me(current_user: User = Depends(get_current_user)):
 async def logout(response: Response, session_token: Optional[str] = Cookie(None)):
     if session_token:
         await db.user_sessions.delete_one({"session_token": session_token})
+        session_cache.invalidate(session_token)
         response.delete_cookie("session_token", path="/", samesite="none", secure=True)
     return {"success": True}
 
@@ -229,20 +1446,18 @@ async def create_client(client_data: ClientCreate, current_user: User = Depends(
     )
     
     client_dict = client.model_dump()
-    client_dict['created_at'] = client_dict['created_at'].isoformat()
     
     await db.clients.insert_one(client_dict)
     return client
 
 @api_router.get("/clients", response_model=List[Client])
-async def get_clients(current_user: User = Depends(get_current_user)):
-    clients = await db.clients.find({"user_id": current_user.id}, {"_id": 0}).to_list(1000)
-    
-    for client in clients:
-        if isinstance(client['created_at'], str):
-            client['created_at'] = datetime.fromisoformat(client['created_at'])
-    
-    return clients
+async def get_clients(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    return await paginate(request, db.clients, {"user_id": current_user.id}, Client, limit, cursor)
 
 @api_router.patch("/clients/{client_id}", response_model=Client)
 async def update_client(client_id: str, client_data: ClientUpdate, current_user: User = Depends(get_current_user)):
@@ -251,18 +1466,15 @@ async def update_client(client_id: str, client_data: ClientUpdate, current_user:
     if not update_data:
         raise HTTPException(status_code=400, detail="No data to update")
     
-    result = await db.clients.update_one(
+    client = await db.clients.find_one_and_update(
         {"id": client_id, "user_id": current_user.id},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if not client:
         raise HTTPException(status_code=404, detail="Client not found")
-    
-    client = await db.clients.find_one({"id": client_id}, {"_id": 0})
-    if isinstance(client['created_at'], str):
-        client['created_at'] = datetime.fromisoformat(client['created_at'])
-    
     return Client(**client)
 
 @api_router.delete("/clients/{client_id}")
@@ -272,6 +1484,29 @@ async def delete_client(client_id: str, current_user: User = Depends(get_current
         raise HTTPException(status_code=404, detail="Client not found")
     return {"success": True}
 
+@api_router.post("/clients/bulk", response_model=BulkResult)
+async def bulk_clients(request: BulkRequest, current_user: User = Depends(get_current_user)):
+    plan = BulkPlan(db.clients, current_user.id, request.operations)
+    await plan.load_targets({})
+    
+    for n, operation in enumerate(request.operations):
+        if operation.op == "create":
+            client_data = plan.validate(n, ClientCreate)
+            if client_data:
+                plan.insert(n, Client(user_id=current_user.id, **client_data.model_dump()).model_dump())
+        elif plan.target(n) is None:
+            continue
+        elif operation.op == "update":
+            client_data = plan.validate(n, ClientUpdate)
+            if client_data and not changed_fields(client_data):
+                plan.reject(n, "invalid", "No data to update")
+            elif client_data:
+                plan.update(n, changed_fields(client_data))
+        else:
+            plan.delete(n)
+    
+    return await plan.execute()
+
 # Asset Routes
 @api_router.post("/assets/upload")
 async def upload_asset(
@@ -280,15 +1515,19 @@ async def upload_asset(
     name: str = Form(...),
     current_user: User = Depends(get_current_user)
 ):
-    # Read file content
-    file_content = await file.read()
-    
-    # For text extraction, try to decode
-    try:
-        content = file_content.decode('utf-8')
-    except:
-        # If can't decode as text, store as base64
+    # Stream the upload into the blob store, sniffing for text on the way
+    sniffer = TextSniffer()
+    sha256, size = await blob_store.put(iter_upload(file, sniffer))
+    
+    # Formats with an extractor (HTML included, though it sniffs as text) are parsed
+    # in the background; other text uploads are usable right away
+    content = None
+    if extractor_suffix(file.filename, file.content_type) not in EXTRACTORS:
+        content = sniffer.text()
+    extraction_status = "done"
+    if content is None:
         content = f"[Binary file: {file.filename}]"
+        extraction_status = "pending"
     
     asset = Asset(
         user_id=current_user.id,
@@ -296,13 +1535,25 @@ async def upload_asset(
         name=name,
         content=content,
         file_name=file.filename,
-        file_data=base64.b64encode(file_content).decode('utf-8')
+        blob_sha256=sha256,
+        file_size=size,
+        content_type=file.content_type,
+        extraction_status=extraction_status
     )
     
     asset_dict = asset.model_dump()
-    asset_dict['created_at'] = asset_dict['created_at'].isoformat()
     
-    await db.assets.insert_one(asset_dict)
+    try:
+        await db.assets.insert_one(asset_dict)
+    except Exception:
+        await blob_store.release(sha256)
+        raise
+    
+    if extraction_status == "pending":
+        spawn_background(run_extraction(asset.id))
+    else:
+        asset_indexes.on_asset_saved(current_user.id, asset_dict)
+        spawn_background(refresh_digest(asset.id))
     return asset
 
 @api_router.post("/assets", response_model=Asset)
@@ -313,37 +1564,200 @@ async def create_asset(asset_data: AssetCreate, current_user: User = Depends(get
     )
     
     asset_dict = asset.model_dump()
-    asset_dict['created_at'] = asset_dict['created_at'].isoformat()
     
     await db.assets.insert_one(asset_dict)
+    asset_indexes.on_asset_saved(current_user.id, asset_dict)
+    spawn_background(refresh_digest(asset.id))
     return asset
 
-@api_router.get("/assets", response_model=List[Asset])
-async def get_assets(asset_type: Optional[str] = None, current_user: User = Depends(get_current_user)):
+# Fields returned by the asset list unless a caller opts into more with fields=
+ASSET_LIST_FIELDS = (
+    "id", "user_id", "type", "name", "file_url", "file_name", "blob_sha256", "file_size", "content_type",
+    "extraction_status", "extraction_error", "created_at"
+)
+ASSET_OPTIONAL_FIELDS = ("content", "content_preview", "digest")
+ASSET_PREVIEW_CHARS = int(os.environ.get('ASSET_PREVIEW_CHARS', '280'))
+
+def asset_projection(fields: Optional[str]) -> dict:
+    if fields:
+        requested = {f.strip() for f in fields.split(',') if f.strip()}
+        unknown = requested - set(ASSET_LIST_FIELDS) - set(ASSET_OPTIONAL_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        # id and created_at are always needed for the pagination cursor
+        requested |= {"id", "created_at"}
+    else:
+        requested = set(ASSET_LIST_FIELDS) | {"content_preview"}
+    
+    projection = {"_id": 0}
+    for field in requested:
+        if field == "content_preview":
+            projection[field] = {"$substrCP": [{"$ifNull": ["$content", ""]}, 0, ASSET_PREVIEW_CHARS]}
+        else:
+            projection[field] = 1
+    return projection
+
+@api_router.get("/assets", response_model=List[AssetSummary])
+async def get_assets(
+    request: Request,
+    asset_type: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
     query = {"user_id": current_user.id}
     if asset_type:
         query["type"] = asset_type
     
-    assets = await db.assets.find(query, {"_id": 0}).to_list(1000)
-    
-    for asset in assets:
-        if isinstance(asset['created_at'], str):
-            asset['created_at'] = datetime.fromisoformat(asset['created_at'])
-    
-    return assets
+    return await paginate(request, db.assets, query, AssetSummary, limit, cursor, asset_projection(fields))
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already covers ``etag`` (serve a 304)."""
+    if_none_match = request.headers.get('if-none-match')
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == '*' or etag in [t.strip() for t in if_none_match.split(',')]
+
+def parse_range(range_header: str, size: int) -> Optional[tuple]:
+    """Parse a single ``bytes=`` range into inclusive offsets.
+
+    Returns None for headers we don't honour (multiple ranges, other units),
+    in which case the full body is served; raises 416 for unsatisfiable ones.
+    """
+    match = re.fullmatch(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*", range_header)
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    
+    first, last = match.group(1), match.group(2)
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+        if int(last) == 0:
+            start = size
+    
+    if start >= size or size == 0:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+@api_router.get("/assets/{asset_id}/download")
+async def download_asset(asset_id: str, request: Request, current_user: User = Depends(get_current_user)):
+    asset = await db.assets.find_one(
+        {"id": asset_id, "user_id": current_user.id},
+        {"_id": 0, "blob_sha256": 1, "file_size": 1, "file_name": 1, "content_type": 1}
+    )
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    if not asset.get('blob_sha256'):
+        raise HTTPException(status_code=404, detail="Asset has no stored file")
+    
+    sha256 = asset['blob_sha256']
+    size = asset['file_size']
+    etag = f'"{sha256}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=0, must-revalidate",
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(asset.get('file_name') or asset_id)}",
+    }
+    
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    byte_range = None
+    range_header = request.headers.get('range')
+    if_range = request.headers.get('if-range')
+    if range_header and (not if_range or if_range.strip() == etag):
+        byte_range = parse_range(range_header, size)
+    
+    media_type = asset.get('content_type') or "application/octet-stream"
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(blob_store.open(sha256), media_type=media_type, headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(blob_store.open(sha256, start, end), status_code=206, media_type=media_type, headers=headers)
 
 @api_router.delete("/assets/{asset_id}")
 async def delete_asset(asset_id: str, current_user: User = Depends(get_current_user)):
-    result = await db.assets.delete_one({"id": asset_id, "user_id": current_user.id})
-    if result.deleted_count == 0:
+    asset = await db.assets.find_one_and_delete({"id": asset_id, "user_id": current_user.id}, {"blob_sha256": 1})
+    if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
+    asset_indexes.on_asset_deleted(current_user.id, asset_id)
+    if asset.get('blob_sha256'):
+        await blob_store.release(asset['blob_sha256'])
     return {"success": True}
 
+@api_router.post("/assets/bulk", response_model=BulkResult)
+async def bulk_assets(request: BulkRequest, current_user: User = Depends(get_current_user)):
+    plan = BulkPlan(db.assets, current_user.id, request.operations)
+    await plan.load_targets({"blob_sha256": 1})
+    
+    created = {}
+    for n, operation in enumerate(request.operations):
+        if operation.op == "create":
+            asset_data = plan.validate(n, AssetCreate)
+            if asset_data:
+                created[n] = Asset(user_id=current_user.id, **asset_data.model_dump()).model_dump()
+                plan.insert(n, created[n])
+        elif plan.target(n) is None:
+            continue
+        elif operation.op == "update":
+            asset_data = plan.validate(n, AssetUpdate)
+            if asset_data and not changed_fields(asset_data):
+                plan.reject(n, "invalid", "No data to update")
+            elif asset_data:
+                plan.update(n, changed_fields(asset_data))
+        else:
+            plan.delete(n)
+    
+    result = await plan.execute()
+    
+    for n in plan.succeeded("create"):
+        asset_indexes.on_asset_saved(current_user.id, created[n])
+    
+    updated_ids = [request.operations[n].id for n in plan.succeeded("update")]
+    if updated_ids:
+        cursor = db.assets.find(
+            {"id": {"$in": updated_ids}, "user_id": current_user.id},
+            {"_id": 0, "id": 1, "type": 1, "content": 1, "digest": 1, "digest_hash": 1}
+        )
+        async for asset in cursor:
+            asset_indexes.on_asset_saved(current_user.id, asset)
+    
+    deleted = [plan.targets[request.operations[n].id] for n in plan.succeeded("delete")]
+    for asset in deleted:
+        asset_indexes.on_asset_deleted(current_user.id, asset['id'])
+    # A concurrent delete can make a "deleted" item a no-op here; only release
+    # blobs when every delete removed a document, so a reference is never dropped twice
+    if plan.deleted_count == len(deleted):
+        for asset in deleted:
+            if asset.get('blob_sha256'):
+                await blob_store.release(asset['blob_sha256'])
+    elif deleted:
+        logger.warning(f"Bulk asset delete removed {plan.deleted_count} of {len(deleted)}; blob references left in place")
+    
+    digest_ids = [created[n]['id'] for n in plan.succeeded("create")] + updated_ids
+    if digest_ids:
+        spawn_background(refresh_digests(digest_ids))
+    return result
+
 # Lead Routes
 @api_router.post("/leads", response_model=Lead)
 async def create_lead(lead_data: LeadCreate, current_user: User = Depends(get_current_user)):
     # Get client name
-    client = await db.clients.find_one({"id": lead_data.client_id, "user_id": current_user.id}, {"_id": 0})
+    client = await db.clients.find_one({"id": lead_data.client_id, "user_id": current_user.id}, {"_id": 0, "name": 1})
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
@@ -354,20 +1768,18 @@ async def create_lead(lead_data: LeadCreate, current_user: User = Depends(get_cu
     )
     
     lead_dict = lead.model_dump()
-    lead_dict['created_at'] = lead_dict['created_at'].isoformat()
     
     await db.leads.insert_one(lead_dict)
     return lead
 
 @api_router.get("/leads", response_model=List[Lead])
-async def get_leads(current_user: User = Depends(get_current_user)):
-    leads = await db.leads.find({"user_id": current_user.id}, {"_id": 0}).to_list(1000)
-    
-    for lead in leads:
-        if isinstance(lead['created_at'], str):
-            lead['created_at'] = datetime.fromisoformat(lead['created_at'])
-    
-    return leads
+async def get_leads(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    return await paginate(request, db.leads, {"user_id": current_user.id}, Lead, limit, cursor)
 
 @api_router.patch("/leads/{lead_id}", response_model=Lead)
 async def update_lead(lead_id: str, lead_data: LeadUpdate, current_user: User = Depends(get_current_user)):
@@ -383,18 +1795,15 @@ async def update_lead(lead_id: str, lead_data: LeadUpdate, current_user: User =
     if not update_data:
         raise HTTPException(status_code=400, detail="No data to update")
     
-    result = await db.leads.update_one(
+    lead = await db.leads.find_one_and_update(
         {"id": lead_id, "user_id": current_user.id},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
-    
-    lead = await db.leads.find_one({"id": lead_id}, {"_id": 0})
-    if isinstance(lead['created_at'], str):
-        lead['created_at'] = datetime.fromisoformat(lead['created_at'])
-    
     return Lead(**lead)
 
 @api_router.delete("/leads/{lead_id}")
@@ -404,23 +1813,1100 @@ async def delete_lead(lead_id: str, current_user: User = Depends(get_current_use
         raise HTTPException(status_code=404, detail="Lead not found")
     return {"success": True}
 
-# Sales Deck Routes
-@api_router.post("/decks/generate", response_model=SalesDeck)
-async def generate_deck(request: DeckGenerateRequest, current_user: User = Depends(get_current_user)):
-    # Get lead details
-    lead = await db.leads.find_one({"id": request.lead_id, "user_id": current_user.id}, {"_id": 0})
-    if not lead:
-        raise HTTPException(status_code=404, detail="Lead not found")
+@api_router.post("/leads/bulk", response_model=BulkResult)
+async def bulk_leads(request: BulkRequest, current_user: User = Depends(get_current_user)):
+    plan = BulkPlan(db.leads, current_user.id, request.operations)
+    await plan.load_targets({})
+    
+    # Resolve every referenced client name in one query
+    client_ids = list({
+        op.data['client_id'] for op in request.operations
+        if op.op != "delete" and op.data and isinstance(op.data.get('client_id'), str)
+    })
+    client_names = {}
+    if client_ids:
+        cursor = db.clients.find({"id": {"$in": client_ids}, "user_id": current_user.id}, {"_id": 0, "id": 1, "name": 1})
+        client_names = {client['id']: client['name'] async for client in cursor}
+    
+    for n, operation in enumerate(request.operations):
+        if operation.op == "create":
+            lead_data = plan.validate(n, LeadCreate)
+            if lead_data and lead_data.client_id not in client_names:
+                plan.reject(n, "invalid", "Client not found")
+            elif lead_data:
+                lead = Lead(user_id=current_user.id, client_name=client_names[lead_data.client_id], **lead_data.model_dump())
+                plan.insert(n, lead.model_dump())
+        elif plan.target(n) is None:
+            continue
+        elif operation.op == "update":
+            lead_data = plan.validate(n, LeadUpdate)
+            if not lead_data:
+                continue
+            update_data = changed_fields(lead_data)
+            if 'client_id' in update_data:
+                if update_data['client_id'] not in client_names:
+                    plan.reject(n, "invalid", "Client not found")
+                    continue
+                update_data['client_name'] = client_names[update_data['client_id']]
+            if update_data:
+                plan.update(n, update_data)
+            else:
+                plan.reject(n, "invalid", "No data to update")
+        else:
+            plan.delete(n)
+    
+    return await plan.execute()
+
+# Import Routes
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '500'))
+IMPORT_SPOOL_MEMORY_BYTES = int(os.environ.get('IMPORT_SPOOL_MEMORY_BYTES', str(8 * 1024 * 1024)))
+IMPORT_MAX_REPORTED_ERRORS = int(os.environ.get('IMPORT_MAX_REPORTED_ERRORS', '1000'))
+IMPORT_FORMATS = {"text/csv": "csv", "application/csv": "csv", NDJSON_MEDIA_TYPE: "ndjson", "application/jsonl": "ndjson"}
+
+async def spool_request_body(request: Request):
+    """Copy the raw body to a temp file that only stays in memory while small."""
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY_BYTES)
+    try:
+        async for chunk in request.stream():
+            await asyncio.to_thread(spool.write, chunk)
+        await asyncio.to_thread(spool.seek, 0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+def _read_import_batch(source, size: int) -> tuple:
+    """Pull up to ``size`` items off a blocking iterator; runs in a worker thread."""
+    items = []
+    while len(items) < size:
+        try:
+            items.append(next(source))
+        except StopIteration:
+            return items, True
+        except csv.Error as e:
+            items.append(e)
+    return items, False
+
+async def iter_import_records(spool, fmt: str):
+    """Yield (row number, record dict or error message) from an upload.
+
+    The spooled body is decoded and parsed incrementally in a worker thread,
+    ``IMPORT_BATCH_SIZE`` rows at a time; ``csv.reader`` handles quoting and
+    newlines inside quoted fields.
+    """
+    text = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+    source = text if fmt == "ndjson" else csv.reader(text)
+    header = None
+    row = 0
+    done = False
+    while not done:
+        items, done = await asyncio.to_thread(_read_import_batch, source, IMPORT_BATCH_SIZE)
+        for item in items:
+            if fmt == "ndjson":
+                if not item.strip():
+                    continue
+                row += 1
+                try:
+                    record = json.loads(item)
+                except ValueError as e:
+                    yield row, f"Invalid JSON: {e}"
+                    continue
+                yield row, record if isinstance(record, dict) else "Expected a JSON object"
+                continue
+            
+            if isinstance(item, csv.Error):
+                row += 1
+                yield row, f"Malformed CSV: {item}"
+                continue
+            if not any(value.strip() for value in item):
+                continue
+            if header is None:
+                header = [name.strip() for name in item]
+                continue
+            row += 1
+            if len(item) != len(header):
+                yield row, f"Expected {len(header)} columns, got {len(item)}"
+                continue
+            yield row, {name: value for name, value in zip(header, item) if name}
+
+class ClientImporter:
+    collection = "clients"
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+
+    async def prepare(self):
+        pass
+
+    def build(self, record: dict) -> dict:
+        return Client(user_id=self.user_id, **ClientCreate(**record).model_dump()).model_dump()
+
+class LeadImporter(ClientImporter):
+    collection = "leads"
+
+    async def prepare(self):
+        # Built once per import so rows never query clients one at a time
+        self.client_names = {}
+        self.client_ids_by_name = {}
+        async for client in db.clients.find({"user_id": self.user_id}, {"_id": 0, "id": 1, "name": 1}):
+            self.client_names[client['id']] = client['name']
+            # None marks a name shared by several clients
+            self.client_ids_by_name[client['name']] = None if client['name'] in self.client_ids_by_name else client['id']
+
+    def build(self, record: dict) -> dict:
+        if not record.get('client_id') and record.get('client_name'):
+            if self.client_ids_by_name.get(record['client_name'], "") is None:
+                raise ValueError(f"Client name is ambiguous: {record['client_name']}")
+            record = {**record, "client_id": self.client_ids_by_name.get(record['client_name'], "")}
+        lead_data = LeadCreate(**record)
+        if lead_data.client_id not in self.client_names:
+            raise ValueError("Client not found")
+        return Lead(
+            user_id=self.user_id,
+            client_name=self.client_names[lead_data.client_id],
+            **lead_data.model_dump()
+        ).model_dump()
+
+IMPORTERS = {"clients": ClientImporter, "leads": LeadImporter}
+
+def _import_error(row: Optional[int], error) -> str:
+    if isinstance(error, ValidationError):
+        error = "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors())
+    return json.dumps({"event": "error", "row": row, "error": str(error)}) + "\n"
+
+async def run_import(importer: ClientImporter, spool, fmt: str):
+    """Validate and insert in batches, streaming NDJSON progress and row errors."""
+    collection = db[importer.collection]
+    stats = {"rows": 0, "inserted": 0, "failed": 0}
+    reported = 0
+    
+    def report(row, error):
+        nonlocal reported
+        stats['failed'] += 1
+        reported += 1
+        return _import_error(row, error) if reported <= IMPORT_MAX_REPORTED_ERRORS else ""
+    
+    async def flush(batch):
+        docs = [doc for _, doc in batch]
+        try:
+            await collection.insert_many(docs, ordered=False)
+            stats['inserted'] += len(docs)
+        except BulkWriteError as e:
+            stats['inserted'] += e.details.get('nInserted', 0)
+            for error in e.details.get('writeErrors', []):
+                yield report(batch[error['index']][0], error.get('errmsg', "Insert failed"))
+        yield json.dumps({"event": "progress", **stats}) + "\n"
     
-    # Get client details
-    client = await db.clients.find_one({"id": lead['client_id'], "user_id": current_user.id}, {"_id": 0})
+    try:
+        await importer.prepare()
+        batch = []
+        async for row, record in iter_import_records(spool, fmt):
+            stats['rows'] += 1
+            if isinstance(record, str):
+                yield report(row, record)
+                continue
+            try:
+                batch.append((row, importer.build(record)))
+            except (ValidationError, ValueError, TypeError) as e:
+                yield report(row, e)
+                continue
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                async for line in flush(batch):
+                    yield line
+                batch = []
+        if batch:
+            async for line in flush(batch):
+                yield line
+        yield json.dumps({"event": "done", **stats}) + "\n"
+    except UnicodeDecodeError:
+        yield _import_error(None, "Upload is not valid UTF-8")
+    finally:
+        await asyncio.to_thread(spool.close)
+
+@api_router.post("/import/{kind}")
+async def import_records(
+    kind: str,
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_user)
+):
+    importer_class = IMPORTERS.get(kind)
+    if importer_class is None:
+        raise HTTPException(status_code=404, detail="Unknown import type")
+    
+    fmt = format or IMPORT_FORMATS.get(request.headers.get('content-type', '').split(';')[0].strip())
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass format=")
+    
+    # The body is spooled before responding: Starlette reads the receive
+    # channel for disconnects once a streaming response starts
+    spool = await spool_request_body(request)
+    return StreamingResponse(run_import(importer_class(current_user.id), spool, fmt), media_type=NDJSON_MEDIA_TYPE)
+
+# Asset retrieval
+DECK_ASSET_TYPES = ("product_description", "use_case")
+ASSET_PASSAGE_WORDS = int(os.environ.get('ASSET_PASSAGE_WORDS', '120'))
+DECK_CONTEXT_TOKEN_BUDGET = int(os.environ.get('DECK_CONTEXT_TOKEN_BUDGET', '3000'))
+DECK_CONTEXT_TOP_K = int(os.environ.get('DECK_CONTEXT_TOP_K', '12'))
+ASSET_INDEX_MAX_USERS = int(os.environ.get('ASSET_INDEX_MAX_USERS', '500'))
+ASSET_INDEX_MAX_AGE_SECONDS = int(os.environ.get('ASSET_INDEX_MAX_AGE_SECONDS', '300'))
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in into is it its of on or our that the their "
+    "this to was we were will with you your they them these those not can".split()
+)
+
+def tokenize(text: str) -> list:
+    return [t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English prose
+    return max(1, len(text) // 4)
+
+def split_passages(text: str, max_words: int = ASSET_PASSAGE_WORDS) -> list:
+    """Pack paragraphs into passages of at most ``max_words`` words."""
+    passages = []
+    current = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        while words:
+            room = max_words - len(current)
+            if room <= 0:
+                passages.append(" ".join(current))
+                current = []
+                room = max_words
+            current.extend(words[:room])
+            words = words[room:]
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+class AssetIndex:
+    """BM25 index over one user's asset passages, updated per asset."""
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self):
+        self.passages = {}  # passage id -> (asset_id, type, text, term counts, length)
+        self.postings = {}  # term -> {passage id: term frequency}
+        self.asset_passages = {}  # asset_id -> [passage ids]
+        self.digests = {}  # asset_id -> digest, when one has been computed
+        self.total_length = 0
+        self.built_at = time.monotonic()
+
+    def add_asset(self, asset: dict):
+        self.remove_asset(asset['id'])
+        if asset.get('type') not in DECK_ASSET_TYPES or not asset.get('content'):
+            return
+        if asset.get('digest') and asset.get('digest_hash') == content_hash(asset['content']):
+            self.digests[asset['id']] = asset['digest']
+        ids = []
+        for n, text in enumerate(split_passages(asset['content'])):
+            terms = Counter(tokenize(text))
+            passage_id = f"{asset['id']}:{n}"
+            length = sum(terms.values())
+            self.passages[passage_id] = (asset['id'], asset['type'], text, terms, length)
+            self.total_length += length
+            for term, tf in terms.items():
+                self.postings.setdefault(term, {})[passage_id] = tf
+            ids.append(passage_id)
+        self.asset_passages[asset['id']] = ids
+
+    def set_digest(self, asset_id: str, digest: str):
+        if asset_id in self.asset_passages:
+            self.digests[asset_id] = digest
+
+    def remove_asset(self, asset_id: str):
+        self.digests.pop(asset_id, None)
+        for passage_id in self.asset_passages.pop(asset_id, ()):
+            _, _, _, terms, length = self.passages.pop(passage_id)
+            self.total_length -= length
+            for term in terms:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(passage_id, None)
+                    if not postings:
+                        del self.postings[term]
+
+    def search(self, query: str, limit: int) -> list:
+        """Return up to ``limit`` ``(score, passage_id)`` pairs, best first."""
+        count = len(self.passages)
+        if not count:
+            return []
+        avg_length = self.total_length / count or 1
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for passage_id, tf in postings.items():
+                length = self.passages[passage_id][4]
+                norm = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+                scores[passage_id] = scores.get(passage_id, 0.0) + idf * norm
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(score, passage_id) for passage_id, score in ranked]
+
+    def select(self, query: str, token_budget: int, top_k: int) -> dict:
+        """Pick the most relevant context that fits the budget, grouped by asset type.
+
+        Assets are taken in the order of their best-ranked passage and are
+        represented by their digest when one exists, or by the passage itself.
+        """
+        ranked = [passage_id for _, passage_id in self.search(query, top_k)]
+        if not ranked:
+            # Nothing matched the query; fall back to each asset's opening passage
+            ranked = [ids[0] for ids in self.asset_passages.values() if ids][:top_k]
+        
+        sections = {asset_type: [] for asset_type in DECK_ASSET_TYPES}
+        remaining = token_budget
+        digested = set()
+        for passage_id in ranked:
+            asset_id, asset_type, text, _, _ = self.passages[passage_id]
+            if asset_id in digested:
+                continue
+            if asset_id in self.digests:
+                text = self.digests[asset_id]
+                digested.add(asset_id)
+            cost = estimate_tokens(text)
+            if cost > remaining:
+                continue
+            sections[asset_type].append(text)
+            remaining -= cost
+        return sections
+
+class AssetIndexRegistry:
+    """LRU of per-user asset indexes, built lazily and kept current on writes.
+
+    Writes in other worker processes aren't seen directly, so an index is also
+    rebuilt once it is older than ``max_age_seconds``.
+    """
+
+    def __init__(self, max_users: int, max_age_seconds: int):
+        self.max_users = max_users
+        self.max_age_seconds = max_age_seconds
+        self._indexes: "OrderedDict[str, AssetIndex]" = OrderedDict()
+        self._locks = {}
+
+    async def get(self, user_id: str) -> AssetIndex:
+        index = self._indexes.get(user_id)
+        if index is not None and time.monotonic() - index.built_at < self.max_age_seconds:
+            self._indexes.move_to_end(user_id)
+            return index
+        
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            index = self._indexes.get(user_id)
+            if index is None or time.monotonic() - index.built_at >= self.max_age_seconds:
+                index = AssetIndex()
+                cursor = db.assets.find(
+                    {
+                        "user_id": user_id,
+                        "type": {"$in": list(DECK_ASSET_TYPES)},
+                        # Binary uploads only hold a placeholder until extracted
+                        "extraction_status": {"$nin": ["pending", "running", "failed", "unsupported"]}
+                    },
+                    {"_id": 0, "id": 1, "type": 1, "content": 1, "digest": 1, "digest_hash": 1}
+                )
+                async for asset in cursor:
+                    index.add_asset(asset)
+                self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                evicted, _ = self._indexes.popitem(last=False)
+                self._locks.pop(evicted, None)
+        return index
+
+    def on_asset_saved(self, user_id: str, asset: dict):
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.add_asset(asset)
+
+    def on_digest(self, user_id: str, asset_id: str, digest: str):
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.set_digest(asset_id, digest)
+
+    def on_asset_deleted(self, user_id: str, asset_id: str):
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.remove_asset(asset_id)
+
+asset_indexes = AssetIndexRegistry(ASSET_INDEX_MAX_USERS, ASSET_INDEX_MAX_AGE_SECONDS)
+
+# Asset digests
+DIGEST_TOKEN_BUDGET = int(os.environ.get('DIGEST_TOKEN_BUDGET', '200'))
+# Content longer than this is summarized in the process pool
+DIGEST_INLINE_MAX_CHARS = int(os.environ.get('DIGEST_INLINE_MAX_CHARS', '20000'))
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def summarize_text(text: str, token_budget: int = DIGEST_TOKEN_BUDGET) -> str:
+    """Extractive summary: the highest-scoring sentences, in document order.
+
+    Sentences are scored by the average corpus frequency of their terms, so
+    the ones that restate the document's main vocabulary win.
+    """
+    if estimate_tokens(text) <= token_budget:
+        return text.strip()
+    
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+|\n+", text) if s.strip()]
+    frequencies = Counter(tokenize(text))
+    if not frequencies:
+        return text[:token_budget * 4].strip()
+    top = frequencies.most_common(1)[0][1]
+    
+    scored = []
+    for position, sentence in enumerate(sentences):
+        terms = tokenize(sentence)
+        if not terms:
+            continue
+        score = sum(frequencies[t] / top for t in terms) / math.sqrt(len(terms))
+        scored.append((score, position, sentence))
+    
+    chosen = []
+    seen = set()
+    remaining = token_budget
+    for score, position, sentence in sorted(scored, reverse=True):
+        cost = estimate_tokens(sentence)
+        if cost > remaining or sentence in seen:
+            continue
+        chosen.append((position, sentence))
+        seen.add(sentence)
+        remaining -= cost
+    
+    if not chosen:
+        return text[:token_budget * 4].strip()
+    return " ".join(sentence for _, sentence in sorted(chosen))
+
+async def refresh_digest(asset_id: str):
+    """Recompute an asset's digest if its content changed since the last one."""
+    asset = await db.assets.find_one(
+        {"id": asset_id},
+        {"_id": 0, "user_id": 1, "type": 1, "content": 1, "digest_hash": 1, "extraction_status": 1}
+    )
+    if not asset or asset.get('extraction_status') in ("pending", "running"):
+        return
+    
+    content = asset.get('content') or ""
+    digest_hash = content_hash(content)
+    if asset.get('digest_hash') == digest_hash:
+        return
     
-    # Get assets
-    assets = await db.assets.find({"user_id": current_user.id}, {"_id": 0}).to_list(1000)
+    if len(content) > DIGEST_INLINE_MAX_CHARS:
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(get_process_pool(), summarize_text, content)
+    else:
+        digest = summarize_text(content)
     
+    # Skip the write if the content moved on while we were summarizing
+    result = await db.assets.update_one(
+        {"id": asset_id, "content": content},
+        {"$set": {"digest": digest, "digest_hash": digest_hash}}
+    )
+    if result.modified_count:
+        asset_indexes.on_digest(asset['user_id'], asset_id, digest)
+
+async def refresh_digests(asset_ids: List[str]):
+    # One at a time so a large bulk write doesn't flood the process pool
+    for asset_id in asset_ids:
+        try:
+            await refresh_digest(asset_id)
+        except Exception:
+            logger.exception(f"Digest refresh failed for asset {asset_id}")
+
+async def backfill_digests(batch_size: int = 100):
+    missing = {"digest_hash": {"$exists": False}, "extraction_status": {"$nin": ["pending", "running"]}}
+    async for asset in db.assets.find(missing, {"_id": 0, "id": 1}).batch_size(batch_size):
+        try:
+            await refresh_digest(asset['id'])
+        except Exception:
+            logger.exception(f"Digest backfill failed for asset {asset['id']}")
+
+# LLM providers
+class LLMProvider:
+    """A chat model that streams its reply to a single prompt."""
+    name = "base"
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the model for cache keys and logs."""
+        raise NotImplementedError
+
+    async def stream(self, system_message: str, prompt: str, session_id: str):
+        raise NotImplementedError
+        yield
+
+    async def warm_up(self):
+        """Load anything expensive ahead of the first request."""
+
+class EmergentProvider(LLMProvider):
+    """LLM calls through ``emergentintegrations``.
+
+    The integration package pulls in every provider SDK it supports, so it is
+    imported on first use (or by ``warm_up``) rather than when the server
+    module loads.
+    """
+    name = "emergent"
+
+    def __init__(self, provider: str, model: str):
+        self.provider = provider
+        self.model = model
+        self._chat_classes = None
+
+    def _load(self) -> tuple:
+        if self._chat_classes is None:
+            from emergentintegrations.llm.chat import LlmChat, UserMessage
+            self._chat_classes = (LlmChat, UserMessage)
+        return self._chat_classes
+
+    async def warm_up(self):
+        # The import is slow and blocking, so keep it off the event loop
+        await asyncio.to_thread(self._load)
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.provider}/{self.model}"
+
+    async def stream(self, system_message: str, prompt: str, session_id: str):
+        """Yield the model's whole response as one chunk.
+
+        ``LlmChat`` has no token stream, so with this backend slides are only
+        parsed (and their SSE events sent) once the full reply has arrived.
+        Use ``LLM_BACKEND=litellm`` for incremental output.
+        """
+        if self._chat_classes is None:
+            await self.warm_up()
+        LlmChat, UserMessage = self._chat_classes
+        chat = LlmChat(
+            api_key=os.environ['EMERGENT_LLM_KEY'],
+            session_id=session_id,
+            system_message=system_message
+        ).with_model(self.provider, self.model)
+        
+        yield await chat.send_message(UserMessage(text=prompt))
+
+class LiteLLMProvider(LLMProvider):
+    """Token-streamed LLM calls through ``litellm``.
+
+    Authenticates with the provider's own key from the environment (such as
+    ``OPENAI_API_KEY``); ``api_base`` points it at a compatible proxy. Like
+    the emergent backend, the package is imported on first use.
+    """
+    name = "litellm"
+
+    def __init__(self, provider: str, model: str, api_base: Optional[str] = None):
+        self.provider = provider
+        self.model = model
+        self.api_base = api_base
+        self._acompletion = None
+
+    def _load(self):
+        if self._acompletion is None:
+            from litellm import acompletion
+            self._acompletion = acompletion
+        return self._acompletion
+
+    async def warm_up(self):
+        await asyncio.to_thread(self._load)
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.provider}/{self.model}"
+
+    async def stream(self, system_message: str, prompt: str, session_id: str):
+        if self._acompletion is None:
+            await self.warm_up()
+        response = await self._acompletion(
+            model=self.model_id,
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            api_base=self.api_base,
+            stream=True
+        )
+        async for chunk in response:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                yield text
+
+class StubProvider(LLMProvider):
+    """Deterministic local stand-in for load tests and benchmarks.
+
+    Replies are a well-formed deck seeded by the prompt, so identical prompts
+    get identical decks. ``latency`` is the delay before the first chunk,
+    ``chunk_delay`` the delay between chunks (with ``stream`` off the reply
+    arrives as one chunk), and ``padding_chars`` grows each slide to simulate
+    larger payloads.
+    """
+    name = "stub"
+    SLIDE_TYPES = ("title", "problem", "solution", "features", "use_case", "roi", "cta")
+
+    def __init__(self, latency: float = 0.0, chunk_delay: float = 0.0, chunk_chars: int = 64,
+                 stream: bool = True, slides: int = 8, padding_chars: int = 0):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunk_chars = max(1, chunk_chars)
+        self.streaming = stream
+        self.slides = slides
+        self.padding_chars = padding_chars
+
+    @property
+    def model_id(self) -> str:
+        return f"stub/{self.slides}x{self.padding_chars}"
+
+    def render(self, prompt: str) -> str:
+        rng = random.Random(hashlib.sha256(prompt.encode('utf-8')).digest())
+        words = re.findall(r"[A-Za-z]{4,}", prompt) or ["value"]
+        
+        def phrase(n: int) -> str:
+            return " ".join(rng.choice(words) for _ in range(n))
+        
+        padding = phrase(max(1, self.padding_chars // 6))[:self.padding_chars] if self.padding_chars else ""
+        slides = []
+        for n in range(self.slides):
+            slide_type = self.SLIDE_TYPES[n % len(self.SLIDE_TYPES)]
+            slide = {"type": slide_type, "title": phrase(3).title()}
+            if slide_type == "title":
+                slide["subtitle"] = phrase(5)
+            elif slide_type in ("problem", "solution"):
+                slide["points"] = [phrase(8) for _ in range(3)]
+            elif slide_type == "features":
+                slide["features"] = [{"name": phrase(2), "description": phrase(10)} for _ in range(3)]
+            elif slide_type == "roi":
+                slide["metrics"] = [{"label": phrase(2), "value": f"{rng.randint(10, 300)}%"} for _ in range(2)]
+            elif slide_type == "cta":
+                slide["action"] = "Schedule a demo"
+            slide["description"] = f"{phrase(12)} {padding}".strip()
+            slides.append(slide)
+        return json.dumps({"title": phrase(4).title(), "slides": slides}, indent=2)
+
+    async def stream(self, system_message: str, prompt: str, session_id: str):
+        text = self.render(prompt)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if not self.streaming:
+            yield text
+            return
+        for start in range(0, len(text), self.chunk_chars):
+            if start and self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            yield text[start:start + self.chunk_chars]
+
+def create_llm_provider() -> LLMProvider:
+    backend = os.environ.get('LLM_BACKEND', 'emergent')
+    if backend == 'stub':
+        return StubProvider(
+            latency=float(os.environ.get('STUB_LLM_LATENCY_MS', '0')) / 1000,
+            chunk_delay=float(os.environ.get('STUB_LLM_CHUNK_DELAY_MS', '0')) / 1000,
+            chunk_chars=int(os.environ.get('STUB_LLM_CHUNK_CHARS', '64')),
+            stream=os.environ.get('STUB_LLM_STREAM', 'true').lower() == 'true',
+            slides=int(os.environ.get('STUB_LLM_SLIDES', '8')),
+            padding_chars=int(os.environ.get('STUB_LLM_PADDING_CHARS', '0'))
+        )
+    if backend == 'emergent':
+        return EmergentProvider(
+            provider=os.environ.get('LLM_MODEL_PROVIDER', 'openai'),
+            model=os.environ.get('LLM_MODEL', 'gpt-4o')
+        )
+    if backend == 'litellm':
+        return LiteLLMProvider(
+            provider=os.environ.get('LLM_MODEL_PROVIDER', 'openai'),
+            model=os.environ.get('LLM_MODEL', 'gpt-4o'),
+            api_base=os.environ.get('LLM_API_BASE') or None
+        )
+    raise ValueError(f"Unknown LLM_BACKEND: {backend}")
+
+llm_provider = create_llm_provider()
+
+# Admission control for LLM calls
+class AdmissionController:
+    """Caps concurrent LLM calls in this process and shares them fairly across users.
+
+    Requests are admitted against a per-user token bucket and an estimate of
+    how long they would queue; calls then wait for a slot in a round-robin
+    queue keyed by user, so one user's batch can't starve everyone else.
+    """
+
+    def __init__(self, max_concurrent: int, rate_per_minute: float, burst: int,
+                 deadline_seconds: float, expected_seconds: float, max_users: int = 10000,
+                 max_workers: Optional[int] = None):
+        self.max_concurrent = max_concurrent
+        # Queued work drains no faster than the deck workers that run it
+        self.capacity = min(max_concurrent, max_workers or max_concurrent)
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.deadline_seconds = deadline_seconds
+        self.service_seconds = expected_seconds  # EWMA of slot hold time
+        self.max_users = max_users
+        self.active = 0
+        self.waiters: "OrderedDict[str, deque]" = OrderedDict()  # user_id -> futures, in turn order
+        self.buckets: "OrderedDict[str, list]" = OrderedDict()  # user_id -> [tokens, last refill]
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self.waiters.values())
+
+    def take_token(self, user_id: str, cost: int = 1) -> float:
+        """Spend ``cost`` tokens, returning 0 or the seconds until they are available."""
+        now = time.monotonic()
+        tokens, updated = self.buckets.pop(user_id, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        self.buckets[user_id] = [tokens, now]
+        while len(self.buckets) > self.max_users:
+            self.buckets.popitem(last=False)
+        if tokens < cost:
+            return (cost - tokens) / self.rate if self.rate else float("inf")
+        self.buckets[user_id][0] = tokens - cost
+        return 0.0
+
+    def estimated_wait(self, backlog: int = 0, cost: int = 1) -> float:
+        """Seconds until the last of ``cost`` new calls would get a slot."""
+        ahead = self.active + self.queued + backlog + cost - 1
+        if ahead < self.capacity:
+            return 0.0
+        return (ahead - self.capacity + 1) / self.capacity * self.service_seconds
+
+    def _reject(self, reason: str, retry_after: float):
+        LLM_ADMISSION_REJECTIONS.inc(reason)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many deck requests; try again later" if reason == "rate" else "Deck generation is busy; try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    async def admit(self, user_id: str, cost: int = 1):
+        """Raise 429 if the user is over their rate or the queue is past its deadline.
+
+        ``cost`` is the number of LLM calls the request will make, e.g. the
+        leads in a batch; more than ``burst`` can never be admitted.
+        """
+        if cost > self.burst:
+            LLM_ADMISSION_REJECTIONS.inc("size")
+            raise HTTPException(status_code=400, detail=f"At most {self.burst} decks can be requested at once")
+        wait = self.estimated_wait(await queued_llm_calls(), cost)
+        if wait > self.deadline_seconds:
+            self._reject("queue", wait - self.deadline_seconds)
+        retry_after = self.take_token(user_id, cost)
+        if retry_after:
+            self._reject("rate", retry_after)
+
+    @asynccontextmanager
+    async def slot(self, user_id: str):
+        started = time.monotonic()
+        if self.active < self.max_concurrent and not self.waiters:
+            self.active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.setdefault(user_id, deque()).append(waiter)
+            LLM_QUEUE_DEPTH.set(value=self.queued)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just as we were cancelled
+                    self._release()
+                else:
+                    self._discard(user_id, waiter)
+                raise
+        LLM_QUEUE_WAIT_SECONDS.observe(value=time.monotonic() - started)
+        LLM_ACTIVE.set(value=self.active)
+        held_from = time.monotonic()
+        try:
+            yield
+        finally:
+            self.service_seconds = 0.8 * self.service_seconds + 0.2 * (time.monotonic() - held_from)
+            self._release()
+
+    def _discard(self, user_id: str, waiter):
+        queue = self.waiters.get(user_id)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self.waiters[user_id]
+        LLM_QUEUE_DEPTH.set(value=self.queued)
+
+    def _release(self):
+        # Hand the slot straight to the next user in turn, keeping it counted as active
+        while self.waiters:
+            user_id, queue = next(iter(self.waiters.items()))
+            waiter = queue.popleft()
+            if queue:
+                self.waiters.move_to_end(user_id)
+            else:
+                del self.waiters[user_id]
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+        else:
+            self.active -= 1
+        LLM_QUEUE_DEPTH.set(value=self.queued)
+        LLM_ACTIVE.set(value=self.active)
+
+async def queued_llm_calls() -> int:
+    """LLM calls that deck jobs still have to make: one per queued single job,
+    one per unfinished lead of a batch (leads already waiting for a slot in
+    this process are counted twice, which errs toward rejecting early)."""
+    pipeline = [
+        {"$match": {"status": {"$in": ["queued", "running"]}}},
+        {"$project": {"calls": {"$cond": [
+            {"$eq": ["$kind", "batch"]},
+            {"$size": {"$filter": {"input": {"$ifNull": ["$results", []]}, "cond": {"$eq": ["$$this.status", "queued"]}}}},
+            {"$cond": [{"$eq": ["$status", "queued"]}, 1, 0]}
+        ]}}},
+        {"$group": {"_id": None, "calls": {"$sum": "$calls"}}}
+    ]
+    rows = await db.deck_jobs.aggregate(pipeline).to_list(1)
+    return rows[0]['calls'] if rows else 0
+
+DECK_WORKERS = int(os.environ.get('DECK_WORKERS', '4'))
+
+llm_admission = AdmissionController(
+    max_concurrent=int(os.environ.get('LLM_MAX_CONCURRENCY', '8')),
+    rate_per_minute=float(os.environ.get('LLM_USER_RATE_PER_MINUTE', '10')),
+    burst=int(os.environ.get('LLM_USER_BURST', '25')),
+    deadline_seconds=float(os.environ.get('LLM_QUEUE_DEADLINE_SECONDS', '120')),
+    expected_seconds=float(os.environ.get('LLM_EXPECTED_SECONDS', '20')),
+    max_workers=DECK_WORKERS
+)
+
+# Sales Deck Generation
+DECK_SYSTEM_MESSAGE = "You are an expert sales presentation creator. Generate compelling, professional sales deck content in JSON format."
+
+class LLMResponseCache:
+    """Persistent cache of LLM responses keyed by (model, system message, prompt).
+
+    Entries live in the ``llm_cache`` collection. A TTL index drops them once
+    ``expires_at`` passes, and the least recently hit entries are evicted when
+    the total cached size exceeds ``max_bytes``.
+
+    The total is a running counter in ``cache_usage``, adjusted with ``$inc``
+    on every put and eviction so writes don't have to sum the collection.
+    TTL deletions bypass it, so ``reconcile_size`` recounts it periodically.
+    """
+    USAGE_ID = "llm_cache"
+
+    def __init__(self, ttl_seconds: int, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_bytes > 0
+
+    @staticmethod
+    def key(model: str, system_message: str, prompt: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model, system_message, prompt):
+            digest.update(part.encode('utf-8'))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        now = datetime.now(timezone.utc)
+        entry = await db.llm_cache.find_one_and_update(
+            {"_id": key, "expires_at": {"$gt": now}},
+            {"$set": {"last_hit_at": now}, "$inc": {"hits": 1}},
+            {"response": 1}
+        )
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry['response']
+
+    async def put(self, key: str, model: str, response: str):
+        if not self.enabled:
+            return
+        now = datetime.now(timezone.utc)
+        size = len(response.encode('utf-8'))
+        previous = await db.llm_cache.find_one_and_replace(
+            {"_id": key},
+            {
+                "model": model,
+                "response": response,
+                "size": size,
+                "hits": 0,
+                "created_at": now,
+                "last_hit_at": now,
+                "expires_at": now + timedelta(seconds=self.ttl_seconds)
+            },
+            {"size": 1},
+            upsert=True
+        )
+        total = await self._add_bytes(size - (previous or {}).get('size', 0))
+        if total > self.max_bytes:
+            await self._evict(total - self.max_bytes)
+
+    async def _add_bytes(self, delta: int) -> int:
+        usage = await db.cache_usage.find_one_and_update(
+            {"_id": self.USAGE_ID},
+            {"$inc": {"bytes": delta}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return usage['bytes']
+
+    async def _evict(self, excess: int):
+        freed = 0
+        async for entry in db.llm_cache.find({}, {"size": 1}).sort("last_hit_at", ASCENDING):
+            if freed >= excess:
+                break
+            result = await db.llm_cache.delete_one({"_id": entry['_id']})
+            if result.deleted_count:
+                self.evictions += 1
+                freed += entry['size']
+        if freed:
+            await self._add_bytes(-freed)
+
+    async def reconcile_size(self):
+        """Reset the running total to the actual size of the cached entries."""
+        totals = await db.llm_cache.aggregate([{"$group": {"_id": None, "size": {"$sum": "$size"}}}]).to_list(1)
+        await db.cache_usage.update_one(
+            {"_id": self.USAGE_ID},
+            {"$set": {"bytes": totals[0]['size'] if totals else 0}},
+            upsert=True
+        )
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+llm_cache = LLMResponseCache(
+    ttl_seconds=int(os.environ.get('LLM_CACHE_TTL_SECONDS', str(7 * 24 * 60 * 60))),
+    max_bytes=int(os.environ.get('LLM_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+)
+LLM_CACHE_RECONCILE_SECONDS = float(os.environ.get('LLM_CACHE_RECONCILE_SECONDS', '3600'))
+
+class SlideStreamParser:
+    """Incrementally scans a streamed ``{"title", "slides": [...]}`` response.
+
+    Text is fed as it arrives; each call returns the events completed by that
+    chunk: the top-level ``title`` once its string closes, and every element of
+    ``slides`` as soon as its closing brace is seen. Anything before the first
+    ``{`` (such as a markdown code fence) is ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.title = None
+        self.slides = []
+        self._pos = 0
+        self._stack = []
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._expect_key = False
+        self._last_key = None
+        self._in_slides = False
+        self._slide_start = None
+
+    def feed(self, chunk: str) -> list:
+        self.text += chunk
+        events = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            if self._done:
+                break
+            c = text[i]
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        value = json.loads(text[self._string_start:i + 1])
+                        if self._expect_key:
+                            self._last_key = value
+                        elif self._last_key == "title" and self.title is None:
+                            self.title = value
+                            events.append(("title", {"title": value}))
+                continue
+            
+            if not self._stack and c != '{':
+                continue
+            
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in '{[':
+                if c == '{' and self._in_slides and len(self._stack) == 2:
+                    self._slide_start = i
+                if c == '[' and len(self._stack) == 1 and self._last_key == "slides":
+                    self._in_slides = True
+                self._stack.append(c)
+                if len(self._stack) == 1:
+                    self._expect_key = True
+            elif c in '}]':
+                self._stack.pop()
+                if c == '}' and self._slide_start is not None and len(self._stack) == 2:
+                    try:
+                        slide = json.loads(text[self._slide_start:i + 1])
+                    except json.JSONDecodeError:
+                        slide = None
+                    self._slide_start = None
+                    if isinstance(slide, dict):
+                        events.append(("slide", {"index": len(self.slides), "slide": slide}))
+                        self.slides.append(slide)
+                elif c == ']' and self._in_slides and len(self._stack) == 1:
+                    self._in_slides = False
+                if not self._stack:
+                    self._done = True
+            elif len(self._stack) == 1:
+                if c == ':':
+                    self._expect_key = False
+                elif c == ',':
+                    self._expect_key = True
+        self._pos = len(text)
+        return events
+
+    @property
+    def complete(self) -> bool:
+        return self._done
+
+async def load_deck_inputs(user_id: str, lead_id: str) -> tuple:
+    # Get lead details
+    lead = await db.leads.find_one({"id": lead_id, "user_id": user_id}, {"_id": 0})
+    if not lead:
+        raise LookupError("Lead not found")
+    
+    # Get client details
+    client = await db.clients.find_one({"id": lead['client_id'], "user_id": user_id}, {"_id": 0})
+    if not client:
+        raise LookupError("Client not found")
+    
+    index = await asset_indexes.get(user_id)
+    return lead, client, select_deck_context(index, lead, client)
+
+def select_deck_context(index: AssetIndex, lead: dict, client: dict) -> dict:
+    # Rank asset passages against what the deck is about
+    started = time.perf_counter()
+    query = " ".join([lead['project_scope'], client['industry'], client['description']])
+    sections = index.select(query, DECK_CONTEXT_TOKEN_BUDGET, DECK_CONTEXT_TOP_K)
+    DECK_STAGE_SECONDS.observe("context", value=time.perf_counter() - started)
+    return sections
+
+def build_deck_prompt(lead: dict, client: dict, sections: dict) -> str:
     # Prepare context for AI
-    product_descriptions = [a['content'] for a in assets if a['type'] == 'product_description']
-    use_cases = [a['content'] for a in assets if a['type'] == 'use_case']
+    product_descriptions = sections.get('product_description', [])
+    use_cases = sections.get('use_case', [])
     
     context = f"""
     Client Information:
@@ -439,13 +2925,6 @@ async def generate_deck(request: DeckGenerateRequest, current_user: User = Depen
     {chr(10).join(use_cases) if use_cases else 'Not provided'}
     """
     
-    # Generate deck using AI
-    chat = LlmChat(
-        api_key=os.environ['EMERGENT_LLM_KEY'],
-        session_id=f"deck_{request.lead_id}",
-        system_message="You are an expert sales presentation creator. Generate compelling, professional sales deck content in JSON format."
-    ).with_model("openai", "gpt-4o")
-    
     prompt = f"""
     Based on the following context, create a comprehensive B2B SaaS sales presentation with 8-10 slides.
     
@@ -502,9 +2981,9 @@ async def generate_deck(request: DeckGenerateRequest, current_user: User = Depen
     }}
     """
     
-    message = UserMessage(text=prompt)
-    response = await chat.send_message(message)
-    
+    return prompt
+
+def parse_deck_response(response: str, client: dict, parser: Optional[SlideStreamParser] = None) -> dict:
     # Parse AI response
     try:
         # Clean response - remove markdown code blocks if present
@@ -514,60 +2993,988 @@ async def generate_deck(request: DeckGenerateRequest, current_user: User = Depen
             if clean_response.endswith('```'):
                 clean_response = clean_response.rsplit('\n', 1)[0]
         
-        deck_content = json.loads(clean_response)
+        return json.loads(clean_response)
     except json.JSONDecodeError:
+        # Keep whatever slides were streamed before the response broke off
+        if parser is not None and parser.slides:
+            return {
+                "title": parser.title or f"Sales Presentation for {client['name']}",
+                "slides": parser.slides
+            }
         # Fallback deck structure
-        deck_content = {
+        return {
             "title": f"Sales Presentation for {client['name']}",
             "slides": [
                 {"type": "title", "title": f"Partnership Proposal for {client['name']}", "subtitle": "Transform Your Business"}
             ]
         }
-    
+
+async def save_deck(user_id: str, lead: dict, deck_content: dict) -> SalesDeck:
     # Save deck
     deck = SalesDeck(
-        user_id=current_user.id,
-        lead_id=request.lead_id,
+        user_id=user_id,
+        lead_id=lead['id'],
         lead_name=lead['client_name'],
         content=deck_content
     )
     
     deck_dict = deck.model_dump()
-    deck_dict['created_at'] = deck_dict['created_at'].isoformat()
     
     await db.sales_decks.insert_one(deck_dict)
     return deck
 
-@api_router.get("/decks", response_model=List[SalesDeck])
-async def get_decks(current_user: User = Depends(get_current_user)):
-    decks = await db.sales_decks.find({"user_id": current_user.id}, {"_id": 0}).to_list(1000)
+async def complete_llm(system_message: str, prompt: str, session_id: str, on_chunk=None) -> str:
+    """Stream a reply from ``llm_provider``, recording latency and size metrics."""
+    model = llm_provider.model_id
+    LLM_PROMPT_CHARS.observe(model, value=len(system_message) + len(prompt))
+    started = time.perf_counter()
+    chunks = []
+    outcome = "error"
+    try:
+        async for chunk in llm_provider.stream(system_message, prompt, session_id):
+            if not chunks:
+                LLM_FIRST_CHUNK_SECONDS.observe(model, value=time.perf_counter() - started)
+            chunks.append(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk)
+        outcome = "ok"
+    finally:
+        LLM_REQUEST_SECONDS.observe(model, outcome, value=time.perf_counter() - started)
+    text = "".join(chunks)
+    LLM_RESPONSE_CHARS.observe(model, value=len(text))
+    return text
+
+def _emit(parser: SlideStreamParser, chunk: str, on_event):
+    for event, data in parser.feed(chunk):
+        if on_event is not None:
+            on_event(event, data)
+
+async def build_deck(user_id: str, lead_id: str, on_event=None, force_refresh: bool = False) -> SalesDeck:
+    """Generate a deck for a lead with the LLM and persist it.
+
+    ``on_event(event, data)`` is called with ``title`` and ``slide`` events as
+    the streamed response completes them. Unless ``force_refresh`` is set, a
+    cached response for an identical prompt is reused instead of calling the
+    model.
+    """
+    lead, client, sections = await load_deck_inputs(user_id, lead_id)
+    return await generate_deck_content(user_id, lead, client, sections, on_event, force_refresh)
+
+async def generate_deck_content(user_id: str, lead: dict, client: dict, sections: dict,
+                                on_event=None, force_refresh: bool = False) -> SalesDeck:
+    started = time.perf_counter()
+    prompt = build_deck_prompt(lead, client, sections)
+    DECK_STAGE_SECONDS.observe("prompt", value=time.perf_counter() - started)
+    model = llm_provider.model_id
+    cache_key = llm_cache.key(model, DECK_SYSTEM_MESSAGE, prompt)
+    
+    parser = SlideStreamParser()
+    cached = None if force_refresh else await llm_cache.get(cache_key)
+    if cached is not None:
+        _emit(parser, cached, on_event)
+    else:
+        # Generate deck using AI
+        started = time.perf_counter()
+        try:
+            async with llm_admission.slot(user_id):
+                await complete_llm(DECK_SYSTEM_MESSAGE, prompt, f"deck_{lead['id']}", lambda chunk: _emit(parser, chunk, on_event))
+        finally:
+            DECK_STAGE_SECONDS.observe("llm", value=time.perf_counter() - started)
+        
+        # Only well-formed responses are worth replaying
+        if parser.complete:
+            await llm_cache.put(cache_key, model, parser.text)
     
-    for deck in decks:
-        if isinstance(deck['created_at'], str):
-            deck['created_at'] = datetime.fromisoformat(deck['created_at'])
+    started = time.perf_counter()
+    deck_content = parse_deck_response(parser.text, client, parser)
+    DECK_STAGE_SECONDS.observe("parse", value=time.perf_counter() - started)
     
-    return decks
+    started = time.perf_counter()
+    deck = await save_deck(user_id, lead, deck_content)
+    DECK_STAGE_SECONDS.observe("persist", value=time.perf_counter() - started)
+    return deck
+
+# Single-slide regeneration
+SLIDE_CONTEXT_TOKEN_BUDGET = int(os.environ.get('SLIDE_CONTEXT_TOKEN_BUDGET', '800'))
+SLIDE_CONTEXT_TOP_K = int(os.environ.get('SLIDE_CONTEXT_TOP_K', '4'))
+DECK_MAX_REVISIONS = int(os.environ.get('DECK_MAX_REVISIONS', '20'))
+
+SLIDE_SYSTEM_MESSAGE = "You are an expert sales presentation creator. Rewrite a single slide of an existing sales deck in JSON format."
+
+# Field shapes per slide type, matching the full-deck prompt
+SLIDE_EXAMPLES = {
+    "title": {"type": "title", "title": "Main title", "subtitle": "Tagline"},
+    "problem": {"type": "problem", "title": "The Challenge", "points": ["point 1", "point 2", "point 3"]},
+    "solution": {"type": "solution", "title": "Our Solution", "description": "Solution overview",
+                 "points": ["benefit 1", "benefit 2", "benefit 3"]},
+    "features": {"type": "features", "title": "Key Features",
+                 "features": [{"name": "Feature 1", "description": "Description"}]},
+    "use_case": {"type": "use_case", "title": "Industry Application", "description": "How it applies to their industry"},
+    "roi": {"type": "roi", "title": "Value Proposition", "metrics": [{"label": "Time Saved", "value": "10-15 hours/week"}]},
+    "cta": {"type": "cta", "title": "Next Steps", "description": "Call to action", "action": "Schedule a demo"},
+}
+
+def build_slide_prompt(deck: dict, index: int, lead: dict, client: dict, sections: dict,
+                       instructions: Optional[str] = None) -> str:
+    slides = deck['content'].get('slides') or []
+    slide = slides[index]
+    example = SLIDE_EXAMPLES.get(slide.get('type'), {key: "..." for key in slide})
+    title_of = lambda other: other.get('title', '') if isinstance(other, dict) else ''
+    neighbours = []
+    if index > 0:
+        neighbours.append(f"- Previous slide: {title_of(slides[index - 1])}")
+    if index + 1 < len(slides):
+        neighbours.append(f"- Next slide: {title_of(slides[index + 1])}")
+    context = "\n".join(passage for passages in sections.values() for passage in passages)
+    requested = f"Requested changes: {instructions}" if instructions else ""
+    
+    return f"""
+    Rewrite slide {index + 1} of {len(slides)} in the deck "{deck['content'].get('title', '')}".
+    
+    Client: {client['name']} ({client['industry']})
+    Project Scope: {lead['project_scope']}
+    {(chr(10) + '    ').join(neighbours)}
+    
+    Current slide:
+    {json.dumps(slide)}
+    
+    Relevant product information:
+    {context or 'Not provided'}
+    
+    {requested}
+    
+    Return ONLY a JSON object for this one slide with this structure (no markdown, no code blocks):
+    {json.dumps(example)}
+    """
+
+def parse_slide_response(response: str, slide_type: Optional[str]) -> dict:
+    text = response.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[-1].rsplit('```', 1)[0]
+    try:
+        slide = json.loads(text)
+    except json.JSONDecodeError:
+        raise ValueError("The model did not return a valid slide")
+    # Tolerate a whole deck coming back by taking the slide of the same type
+    if isinstance(slide, dict) and isinstance(slide.get('slides'), list):
+        slide = next((s for s in slide['slides'] if isinstance(s, dict) and s.get('type') == slide_type), None)
+    if not isinstance(slide, dict) or not slide.get('title'):
+        raise ValueError("The model did not return a valid slide")
+    if slide_type:
+        slide['type'] = slide_type
+    return slide
+
+async def regenerate_slide(user_id: str, deck: dict, index: int, instructions: Optional[str] = None) -> dict:
+    """Rewrite one slide in place, keeping the replaced slide in ``revisions``."""
+    lead = await db.leads.find_one({"id": deck['lead_id'], "user_id": user_id}, {"_id": 0})
+    if not lead:
+        raise LookupError("Lead not found")
+    client = await db.clients.find_one({"id": lead['client_id'], "user_id": user_id}, {"_id": 0})
+    if not client:
+        raise LookupError("Client not found")
+    
+    slide = deck['content']['slides'][index]
+    asset_index = await asset_indexes.get(user_id)
+    query = " ".join([str(slide.get('title', '')), str(slide.get('type', '')), lead['project_scope'], client['industry']])
+    sections = asset_index.select(query, SLIDE_CONTEXT_TOKEN_BUDGET, SLIDE_CONTEXT_TOP_K)
+    
+    prompt = build_slide_prompt(deck, index, lead, client, sections, instructions)
+    async with llm_admission.slot(user_id):
+        response = await complete_llm(SLIDE_SYSTEM_MESSAGE, prompt, f"deck_{deck['id']}_slide_{index}")
+    new_slide = parse_slide_response(response, slide.get('type'))
+    
+    version = deck.get('version', 1)
+    # Only apply the edit if nobody changed the deck while the model was running
+    version_filter = {"version": version} if 'version' in deck else {"version": {"$exists": False}}
+    return await db.sales_decks.find_one_and_update(
+        {"id": deck['id'], "user_id": user_id, **version_filter},
+        {
+            "$set": {f"content.slides.{index}": new_slide, "version": version + 1},
+            "$push": {"revisions": {
+                "$each": [{
+                    "version": version,
+                    "slide_index": index,
+                    "slide": slide,
+                    "created_at": datetime.now(timezone.utc)
+                }],
+                "$slice": -DECK_MAX_REVISIONS
+            }}
+        },
+        projection={"_id": 0, "revisions": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+# Deck generation jobs
+DECK_JOB_POLL_SECONDS = float(os.environ.get('DECK_JOB_POLL_SECONDS', '2'))
+DECK_JOB_TIMEOUT_SECONDS = int(os.environ.get('DECK_JOB_TIMEOUT_SECONDS', '300'))
+DECK_JOB_MAX_ATTEMPTS = int(os.environ.get('DECK_JOB_MAX_ATTEMPTS', '3'))
+DECK_JOB_SWEEP_SECONDS = float(os.environ.get('DECK_JOB_SWEEP_SECONDS', '60'))
+DECK_BATCH_CONCURRENCY = int(os.environ.get('DECK_BATCH_CONCURRENCY', '4'))
+JOB_TERMINAL_STATES = ("succeeded", "failed")
+
+class JobEvents:
+    """In-process fan-out of deck job events to SSE subscribers."""
+
+    def __init__(self):
+        self._subscribers = {}
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=100)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def publish(self, job_id: str, event: str, data: dict):
+        for queue in self._subscribers.get(job_id, ()):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                pass
+
+job_events = JobEvents()
+_job_wakeup = asyncio.Event()
+_deck_workers = []
+
+async def update_job(job_id: str, fields: dict) -> Optional[dict]:
+    fields = {**fields, "updated_at": datetime.now(timezone.utc)}
+    job = await db.deck_jobs.find_one_and_update(
+        {"id": job_id},
+        {"$set": fields},
+        {"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if job:
+        job_events.publish(job_id, "status", DeckJob(**job).model_dump(mode="json"))
+    return job
+
+async def enqueue_deck_job(user_id: str, lead_id: str, force_refresh: bool = False) -> DeckJob:
+    job = DeckJob(user_id=user_id, lead_id=lead_id, force_refresh=force_refresh)
+    await db.deck_jobs.insert_one(job.model_dump())
+    _job_wakeup.set()
+    return job
+
+async def enqueue_batch_job(user_id: str, lead_ids: List[str], force_refresh: bool = False) -> DeckJob:
+    lead_ids = list(dict.fromkeys(lead_ids))
+    job = DeckJob(
+        user_id=user_id,
+        kind="batch",
+        lead_ids=lead_ids,
+        results=[DeckBatchResult(lead_id=lead_id) for lead_id in lead_ids],
+        force_refresh=force_refresh
+    )
+    await db.deck_jobs.insert_one(job.model_dump())
+    _job_wakeup.set()
+    return job
+
+async def run_batch(job: dict):
+    """Generate decks for every lead in a batch job.
+
+    Leads, clients and the asset index are loaded once for the whole batch;
+    LLM calls then fan out under a semaphore. Each lead's outcome is written
+    to ``results`` as soon as it finishes, and leads that already succeeded
+    (on a previous attempt) are skipped.
+    """
+    user_id = job['user_id']
+    pending = [
+        (position, result['lead_id']) for position, result in enumerate(job['results'])
+        if result['status'] != "succeeded"
+    ]
+    lead_ids = [lead_id for _, lead_id in pending]
+    
+    leads = {
+        lead['id']: lead
+        async for lead in db.leads.find({"user_id": user_id, "id": {"$in": lead_ids}}, {"_id": 0})
+    }
+    client_ids = list({lead['client_id'] for lead in leads.values()})
+    clients = {
+        client['id']: client
+        async for client in db.clients.find({"user_id": user_id, "id": {"$in": client_ids}}, {"_id": 0})
+    }
+    index = await asset_indexes.get(user_id)
+    semaphore = asyncio.Semaphore(DECK_BATCH_CONCURRENCY)
+    
+    async def generate_one(position: int, lead_id: str) -> bool:
+        lead = leads.get(lead_id)
+        client = clients.get(lead['client_id']) if lead else None
+        if lead is None or client is None:
+            result = {"lead_id": lead_id, "status": "failed", "deck_id": None,
+                      "error": "Lead not found" if lead is None else "Client not found"}
+        else:
+            async with semaphore:
+                try:
+                    deck = await generate_deck_content(
+                        user_id, lead, client, select_deck_context(index, lead, client),
+                        force_refresh=job.get('force_refresh', False)
+                    )
+                    result = {"lead_id": lead_id, "status": "succeeded", "deck_id": deck.id, "error": None}
+                except Exception as e:
+                    logger.exception(f"Batch {job['id']} failed for lead {lead_id}")
+                    result = {"lead_id": lead_id, "status": "failed", "deck_id": None, "error": str(e)}
+        await update_job(job['id'], {f"results.{position}": result})
+        job_events.publish(job['id'], "result", result)
+        return result['status'] == "succeeded"
+    
+    outcomes = await asyncio.gather(*(generate_one(position, lead_id) for position, lead_id in pending))
+    already_done = len(job['results']) - len(pending)
+    if outcomes and not any(outcomes) and not already_done:
+        await update_job(job['id'], {"status": "failed", "error": "No decks were generated"})
+    else:
+        await update_job(job['id'], {"status": "succeeded"})
+
+async def _claim_deck_job() -> Optional[dict]:
+    """Claim the oldest queued job of the users with the fewest running jobs.
+
+    Plain FIFO would let one user's burst occupy every worker; trying the
+    least-loaded users first gives each user's next job the next free worker.
+    """
+    running = {
+        row['_id']: row['count']
+        async for row in db.deck_jobs.aggregate([
+            {"$match": {"status": "running"}},
+            {"$group": {"_id": "$user_id", "count": {"$sum": 1}}}
+        ])
+    }
+    for load in sorted(set(running.values()) | {0}):
+        busier = [user_id for user_id, count in running.items() if count > load]
+        job = await db.deck_jobs.find_one_and_update(
+            {"status": "queued", "user_id": {"$nin": busier}},
+            {
+                "$set": {"status": "running", "started_at": datetime.now(timezone.utc), "updated_at": datetime.now(timezone.utc)},
+                "$inc": {"attempts": 1}
+            },
+            {"_id": 0},
+            sort=[("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job:
+            return job
+    return None
+
+async def run_deck_job(job: dict):
+    job_events.publish(job['id'], "status", DeckJob(**job).model_dump(mode="json"))
+    if job.get('kind') == "batch":
+        try:
+            await run_batch(job)
+        except asyncio.CancelledError:
+            await update_job(job['id'], {"status": "queued"})
+            raise
+        except Exception as e:
+            logger.exception(f"Deck batch {job['id']} failed")
+            await update_job(job['id'], {"status": "failed", "error": str(e)})
+        return
+    
+    try:
+        deck = await build_deck(
+            job['user_id'],
+            job['lead_id'],
+            on_event=lambda event, data: job_events.publish(job['id'], event, data),
+            force_refresh=job.get('force_refresh', False)
+        )
+    except asyncio.CancelledError:
+        # Shutting down: hand the job back so the next worker picks it up
+        await update_job(job['id'], {"status": "queued"})
+        raise
+    except Exception as e:
+        logger.exception(f"Deck job {job['id']} failed")
+        await update_job(job['id'], {"status": "failed", "error": str(e)})
+        return
+    await update_job(job['id'], {"status": "succeeded", "deck_id": deck.id})
+
+async def requeue_stale_deck_jobs():
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=DECK_JOB_TIMEOUT_SECONDS)
+    # Running jobs touch updated_at as they make progress, so it doubles as a heartbeat
+    stale = {"status": "running", "updated_at": {"$lt": stale_before}}
+    await db.deck_jobs.update_many(
+        {**stale, "attempts": {"$gte": DECK_JOB_MAX_ATTEMPTS}},
+        {"$set": {"status": "failed", "error": "Job timed out", "updated_at": datetime.now(timezone.utc)}}
+    )
+    result = await db.deck_jobs.update_many(
+        stale,
+        {"$set": {"status": "queued", "updated_at": datetime.now(timezone.utc)}}
+    )
+    if result.modified_count:
+        _job_wakeup.set()
+
+async def deck_worker(worker_id: int):
+    while True:
+        # Cleared before claiming so an enqueue racing the claim still wakes us
+        _job_wakeup.clear()
+        try:
+            job = await _claim_deck_job()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Deck worker {worker_id} could not claim a job")
+            job = None
+        
+        if job is None:
+            # Jobs enqueued by other processes are only seen on the next poll
+            try:
+                await asyncio.wait_for(_job_wakeup.wait(), timeout=DECK_JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        
+        await run_deck_job(job)
+
+async def stale_deck_job_sweeper():
+    # Its own task so stale jobs are recovered even while every worker is busy
+    await run_periodically(DECK_JOB_SWEEP_SECONDS, requeue_stale_deck_jobs, "requeue stale deck jobs")
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+# Deck export
+# Bump when the renderers change so cached exports are rebuilt
+DECK_EXPORT_RENDER_VERSION = "1"
+
+def _slide_lines(slide: dict) -> list:
+    """Flatten any slide type into (text, is_bullet) lines below its title."""
+    lines = []
+    for key in ("subtitle", "description"):
+        if slide.get(key):
+            lines.append((str(slide[key]), False))
+    for point in slide.get('points') or []:
+        lines.append((str(point), True))
+    for feature in slide.get('features') or []:
+        if isinstance(feature, dict):
+            lines.append((f"{feature.get('name', '')}: {feature.get('description', '')}".strip(": "), True))
+    for metric in slide.get('metrics') or []:
+        if isinstance(metric, dict):
+            lines.append((f"{metric.get('label', '')}: {metric.get('value', '')}".strip(": "), True))
+    if slide.get('action'):
+        lines.append((str(slide['action']), False))
+    return lines
+
+def render_deck_pptx(content: dict) -> bytes:
+    from pptx import Presentation
+    from pptx.util import Inches, Pt
+    presentation = Presentation()
+    presentation.slide_width = Inches(13.333)
+    presentation.slide_height = Inches(7.5)
+    for slide in content.get('slides') or []:
+        if not isinstance(slide, dict):
+            continue
+        if slide.get('type') == "title":
+            page = presentation.slides.add_slide(presentation.slide_layouts[0])
+            page.shapes.title.text = str(slide.get('title') or content.get('title') or "")
+            page.placeholders[1].text = str(slide.get('subtitle') or "")
+            continue
+        page = presentation.slides.add_slide(presentation.slide_layouts[1])
+        page.shapes.title.text = str(slide.get('title') or "")
+        body = page.placeholders[1]
+        body.width = presentation.slide_width - 2 * body.left
+        frame = body.text_frame
+        for n, (text, is_bullet) in enumerate(_slide_lines(slide)):
+            paragraph = frame.paragraphs[0] if n == 0 else frame.add_paragraph()
+            paragraph.text = text
+            paragraph.font.size = Pt(20 if is_bullet else 22)
+            paragraph.font.bold = not is_bullet
+    out = io.BytesIO()
+    presentation.save(out)
+    return out.getvalue()
+
+def render_deck_pdf(content: dict) -> bytes:
+    from reportlab.lib.pagesizes import landscape, A4
+    from reportlab.lib.utils import simpleSplit
+    from reportlab.pdfgen import canvas
+    width, height = landscape(A4)
+    margin = 56
+    out = io.BytesIO()
+    pdf = canvas.Canvas(out, pagesize=(width, height))
+    pdf.setTitle(str(content.get('title') or "Sales deck"))
+    for slide in content.get('slides') or []:
+        if not isinstance(slide, dict):
+            continue
+        y = height - margin - 28
+        title_size = 34 if slide.get('type') == "title" else 26
+        for line in simpleSplit(str(slide.get('title') or ""), "Helvetica-Bold", title_size, width - 2 * margin):
+            pdf.setFont("Helvetica-Bold", title_size)
+            pdf.drawString(margin, y, line)
+            y -= title_size * 1.25
+        y -= 12
+        for text, is_bullet in _slide_lines(slide):
+            font, size = ("Helvetica", 15) if is_bullet else ("Helvetica-Oblique", 17)
+            indent = 18 if is_bullet else 0
+            for n, line in enumerate(simpleSplit(text, font, size, width - 2 * margin - indent)):
+                if y < margin:
+                    break
+                pdf.setFont(font, size)
+                if is_bullet and n == 0:
+                    pdf.drawString(margin, y, "\u2022")
+                pdf.drawString(margin + indent, y, line)
+                y -= size * 1.4
+            y -= 6
+        pdf.showPage()
+    pdf.save()
+    return out.getvalue()
+
+DECK_EXPORT_FORMATS = {
+    "pptx": (render_deck_pptx, "application/vnd.openxmlformats-officedocument.presentationml.presentation"),
+    "pdf": (render_deck_pdf, "application/pdf"),
+}
+
+# (deck id, format, content hash) -> [lock, requests holding or waiting on it]
+_export_locks = {}
+
+def deck_content_hash(content: dict) -> str:
+    payload = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{DECK_EXPORT_RENDER_VERSION}:{payload}".encode('utf-8')).hexdigest()
+
+async def get_deck_export(deck: dict, fmt: str) -> dict:
+    """Return the cached export of ``deck``, rendering it in the process pool on a miss."""
+    content_hash = deck_content_hash(deck['content'])
+    key = {"deck_id": deck['id'], "format": fmt, "content_hash": content_hash}
+    export = await db.deck_exports.find_one(key)
+    if export:
+        return export
+    
+    # Concurrent requests for the same export wait for one render
+    lock_key = (deck['id'], fmt, content_hash)
+    entry = _export_locks.setdefault(lock_key, [asyncio.Lock(), 0])
+    lock = entry[0]
+    entry[1] += 1
+    try:
+        async with lock:
+            export = await db.deck_exports.find_one(key)
+            if export:
+                return export
+            
+            renderer, media_type = DECK_EXPORT_FORMATS[fmt]
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(get_process_pool(), renderer, deck['content'])
+            sha256, size = await blob_store.put(_single_chunk(data))
+            export = {
+                **key,
+                "user_id": deck['user_id'],
+                "blob_sha256": sha256,
+                "size": size,
+                "media_type": media_type,
+                "created_at": datetime.now(timezone.utc)
+            }
+            try:
+                await db.deck_exports.insert_one(export)
+            except DuplicateKeyError:
+                # Another process rendered it first; keep theirs
+                await blob_store.release(sha256)
+                return await db.deck_exports.find_one(key)
+    finally:
+        # The last request out drops the lock; earlier ones leave it for the waiters
+        entry[1] -= 1
+        if not entry[1]:
+            _export_locks.pop(lock_key, None)
+    
+    # Drop renders of earlier versions of this deck
+    async for stale in db.deck_exports.find(
+        {"deck_id": deck['id'], "format": fmt, "content_hash": {"$ne": content_hash}},
+        {"blob_sha256": 1}
+    ):
+        result = await db.deck_exports.delete_one({"_id": stale['_id']})
+        if result.deleted_count:
+            await blob_store.release(stale['blob_sha256'])
+    return export
+
+# Sales Deck Routes
+@api_router.post("/decks/generate", response_model=DeckJob, status_code=202)
+async def generate_deck(request: DeckGenerateRequest, current_user: User = Depends(get_current_user)):
+    lead = await db.leads.find_one({"id": request.lead_id, "user_id": current_user.id}, {"_id": 0, "id": 1})
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    
+    await llm_admission.admit(current_user.id)
+    return await enqueue_deck_job(current_user.id, request.lead_id, request.force_refresh)
+
+@api_router.post("/decks/generate-batch", response_model=DeckJob, status_code=202)
+async def generate_deck_batch(request: DeckBatchRequest, current_user: User = Depends(get_current_user)):
+    # Each lead is one LLM call, so a batch is charged per lead
+    await llm_admission.admit(current_user.id, len(set(request.lead_ids)))
+    return await enqueue_batch_job(current_user.id, request.lead_ids, request.force_refresh)
+
+@api_router.post("/decks/generate/stream")
+async def generate_deck_stream(request: DeckGenerateRequest, current_user: User = Depends(get_current_user)):
+    lead = await db.leads.find_one({"id": request.lead_id, "user_id": current_user.id}, {"_id": 0, "id": 1})
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    
+    await llm_admission.admit(current_user.id)
+    queue = asyncio.Queue()
+    
+    async def generate():
+        try:
+            deck = await build_deck(
+                current_user.id,
+                request.lead_id,
+                on_event=lambda event, data: queue.put_nowait((event, data)),
+                force_refresh=request.force_refresh
+            )
+            queue.put_nowait(("deck", deck.model_dump(mode="json")))
+        except Exception as e:
+            logger.exception(f"Streamed deck generation failed for lead {request.lead_id}")
+            queue.put_nowait(("error", {"detail": str(e)}))
+    
+    # Generation runs detached so the deck is still saved if the client goes away
+    spawn_background(generate())
+    
+    async def events():
+        while True:
+            event, data = await queue.get()
+            yield format_sse(event, data)
+            if event in ("deck", "error"):
+                return
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/decks/jobs/{job_id}", response_model=DeckJob)
+async def get_deck_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = await db.deck_jobs.find_one({"id": job_id, "user_id": current_user.id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return DeckJob(**job)
+
+@api_router.get("/decks/jobs/{job_id}/events")
+async def stream_deck_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = await db.deck_jobs.find_one({"id": job_id, "user_id": current_user.id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        queue = job_events.subscribe(job_id)
+        try:
+            current = DeckJob(**job).model_dump(mode="json")
+            yield format_sse("status", current)
+            while current['status'] not in JOB_TERMINAL_STATES:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=DECK_JOB_POLL_SECONDS * 5)
+                except asyncio.TimeoutError:
+                    # The job may be running in another process; fall back to Mongo
+                    latest = await db.deck_jobs.find_one({"id": job_id}, {"_id": 0})
+                    if not latest:
+                        return
+                    latest = DeckJob(**latest).model_dump(mode="json")
+                    if latest['status'] != current['status']:
+                        current = latest
+                        yield format_sse("status", current)
+                    else:
+                        yield ": keep-alive\n\n"
+                    continue
+                if event == "status":
+                    current = data
+                yield format_sse(event, data)
+        finally:
+            job_events.unsubscribe(job_id, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/decks", response_model=List[SalesDeck])
+async def get_decks(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    # Decks saved before slide versioning have no version; report 1 as the model would
+    projection = {**model_projection(SalesDeck), "version": {"$ifNull": ["$version", 1]}}
+    return await paginate(request, db.sales_decks, {"user_id": current_user.id}, SalesDeck, limit, cursor, projection)
 
 @api_router.get("/decks/{deck_id}", response_model=SalesDeck)
 async def get_deck(deck_id: str, current_user: User = Depends(get_current_user)):
-    deck = await db.sales_decks.find_one({"id": deck_id, "user_id": current_user.id}, {"_id": 0})
+    deck = await db.sales_decks.find_one({"id": deck_id, "user_id": current_user.id}, {"_id": 0, "revisions": 0})
     if not deck:
         raise HTTPException(status_code=404, detail="Deck not found")
     
-    if isinstance(deck['created_at'], str):
-        deck['created_at'] = datetime.fromisoformat(deck['created_at'])
-    
     return SalesDeck(**deck)
 
+@api_router.post("/decks/{deck_id}/slides/{index}/regenerate", response_model=SalesDeck)
+async def regenerate_deck_slide(
+    deck_id: str,
+    index: int,
+    request: Optional[SlideRegenerateRequest] = None,
+    current_user: User = Depends(get_current_user)
+):
+    deck = await db.sales_decks.find_one({"id": deck_id, "user_id": current_user.id}, {"_id": 0, "revisions": 0})
+    if not deck:
+        raise HTTPException(status_code=404, detail="Deck not found")
+    slides = deck['content'].get('slides') if isinstance(deck['content'], dict) else None
+    if not isinstance(slides, list) or not 0 <= index < len(slides) or not isinstance(slides[index], dict):
+        raise HTTPException(status_code=404, detail="Slide not found")
+    
+    await llm_admission.admit(current_user.id)
+    try:
+        updated = await regenerate_slide(current_user.id, deck, index, request.instructions if request else None)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    
+    if not updated:
+        raise HTTPException(status_code=409, detail="Deck changed while the slide was regenerating; try again")
+    return SalesDeck(**updated)
+
+@api_router.get("/decks/{deck_id}/export")
+async def export_deck(
+    deck_id: str,
+    request: Request,
+    format: str = Query("pptx", pattern="^(pptx|pdf)$"),
+    current_user: User = Depends(get_current_user)
+):
+    deck = await db.sales_decks.find_one({"id": deck_id, "user_id": current_user.id}, {"_id": 0, "revisions": 0})
+    if not deck:
+        raise HTTPException(status_code=404, detail="Deck not found")
+    
+    export = await get_deck_export(deck, format)
+    title = (deck['content'].get('title') if isinstance(deck['content'], dict) else None) or deck['lead_name']
+    etag = f'"{export["content_hash"]}-{format}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=0, must-revalidate",
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(f'{title}.{format}')}",
+    }
+    
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    headers["Content-Length"] = str(export['size'])
+    return StreamingResponse(blob_store.open(export['blob_sha256']), media_type=export['media_type'], headers=headers)
+
+# Dashboard Routes
+def _owned_by(user_var: str, *joins) -> dict:
+    # $lookup sub-pipeline match on user_id plus join keys; equality in $expr
+    # lets MongoDB 5.0+ use the compound (user_id, ...) indexes
+    clauses = [{"$eq": ["$user_id", f"$${user_var}"]}]
+    clauses.extend({"$eq": [f"${field}", f"$${var}"]} for field, var in joins)
+    return {"$match": {"$expr": {"$and": clauses}}}
+
+def _counts_by(field: str) -> dict:
+    # [{_id, count}] -> {_id: count}; null keys (old documents) are bucketed as "unknown"
+    return {"$arrayToObject": {"$map": {
+        "input": field,
+        "as": "row",
+        "in": {"k": {"$ifNull": [{"$toString": "$$row._id"}, "unknown"]}, "v": "$$row.count"}
+    }}}
+
+def dashboard_pipeline(user_id: str, lead_limit: int, lead_cursor: Optional[str] = None) -> list:
+    """One document with the user's clients, a page of leads and overall counts.
+
+    Leads are the only part that grows with use, so they are paged like the
+    list routes: ``lead_limit + 1`` are fetched to tell whether more remain.
+    """
+    group_count = lambda key: {"$group": {"_id": key, "count": {"$sum": 1}}}
+    after = [{"$match": after_cursor(lead_cursor)}] if lead_cursor else []
+    return [
+        {"$match": {"id": user_id}},
+        {"$project": {"_id": 0, "id": 1}},
+        {"$lookup": {
+            "from": "clients",
+            "let": {"uid": "$id"},
+            "pipeline": [
+                _owned_by("uid"),
+                {"$sort": {"created_at": -1, "id": -1}},
+                {"$lookup": {
+                    "from": "leads",
+                    "let": {"uid": "$user_id", "cid": "$id"},
+                    "pipeline": [_owned_by("uid", ("client_id", "cid")), group_count("$status")],
+                    "as": "lead_status"
+                }},
+                {"$project": {
+                    "_id": 0, "id": 1, "name": 1, "industry": 1,
+                    "lead_counts": _counts_by("$lead_status"),
+                    "lead_total": {"$sum": "$lead_status.count"}
+                }}
+            ],
+            "as": "clients"
+        }},
+        {"$lookup": {
+            "from": "leads",
+            "let": {"uid": "$id"},
+            "pipeline": [
+                _owned_by("uid"),
+                *after,
+                {"$sort": {"created_at": -1, "id": -1}},
+                {"$limit": lead_limit + 1},
+                {"$project": {"_id": 0, "id": 1, "user_id": 1, "client_id": 1, "client_name": 1,
+                              "status": 1, "created_at": 1}},
+                {"$lookup": {
+                    "from": "sales_decks",
+                    "let": {"uid": "$user_id", "lid": "$id"},
+                    "pipeline": [
+                        _owned_by("uid", ("lead_id", "lid")),
+                        {"$sort": {"created_at": -1}},
+                        {"$limit": 1},
+                        {"$project": {"_id": 0, "id": 1, "title": "$content.title", "created_at": 1}}
+                    ],
+                    "as": "latest_deck"
+                }},
+                {"$set": {"latest_deck": {"$first": "$latest_deck"}}},
+                {"$unset": "user_id"}
+            ],
+            "as": "leads"
+        }},
+        {"$lookup": {
+            "from": "assets",
+            "let": {"uid": "$id"},
+            "pipeline": [_owned_by("uid"), group_count("$type")],
+            "as": "asset_counts"
+        }},
+        {"$lookup": {
+            "from": "sales_decks",
+            "let": {"uid": "$id"},
+            "pipeline": [_owned_by("uid"), {"$count": "count"}],
+            "as": "deck_total"
+        }},
+        {"$project": {
+            "_id": 0,
+            "clients": 1,
+            "leads": 1,
+            "asset_counts": _counts_by("$asset_counts"),
+            "deck_total": {"$ifNull": [{"$first": "$deck_total.count"}, 0]}
+        }}
+    ]
+
+@api_router.get("/dashboard", response_model=Dashboard)
+async def get_dashboard(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    # One round trip instead of listing clients, leads, assets and decks separately;
+    # further pages of leads come from X-Next-Cursor like the list routes
+    page_size = limit or DEFAULT_PAGE_SIZE
+    rows = await db.users.aggregate(dashboard_pipeline(current_user.id, page_size, cursor)).to_list(1)
+    if not rows:
+        return Dashboard()
+    dashboard = rows[0]
+    if len(dashboard['leads']) > page_size:
+        dashboard['leads'] = dashboard['leads'][:page_size]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(dashboard['leads'][-1])
+    return dashboard
+
+# System Routes
+def check_operator_token(authorization: Optional[str], allow_unset: bool = False):
+    """Require ``Authorization: Bearer $METRICS_TOKEN`` on operator endpoints.
+
+    Without a configured token they are hidden, unless ``allow_unset`` (as for
+    /metrics, which local scrapers hit without credentials).
+    """
+    token = os.environ.get('METRICS_TOKEN')
+    if not token:
+        if allow_unset:
+            return
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest((authorization or "").encode('utf-8'), f"Bearer {token}".encode('utf-8')):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+async def require_operator(authorization: Optional[str] = Header(None)):
+    check_operator_token(authorization)
+
+@api_router.get("/system/indexes", dependencies=[Depends(require_operator)])
+async def get_index_status():
+    return index_status
+
+@api_router.get("/system/llm-cache", dependencies=[Depends(require_operator)])
+async def get_llm_cache_stats():
+    return llm_cache.stats()
+
+@api_router.get("/system/session-cache", dependencies=[Depends(require_operator)])
+async def get_session_cache_stats():
+    return session_cache.stats()
+
+@api_router.get("/system/migrations", dependencies=[Depends(require_operator)])
+async def get_migration_status():
+    return await db.migrations.find({}, {"last_id": 0}).to_list(100)
+
 # Include the router in the main app
 app.include_router(api_router)
 
+def route_template(scope) -> str:
+    # Label by path template so ids don't explode the series count
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+class RequestMetricsMiddleware:
+    """Records request latency and in-flight counts per route template.
+
+    Plain ASGI rather than ``@app.middleware``: BaseHTTPMiddleware stops its
+    timer once the headers are sent, which for streamed (SSE, NDJSON, file)
+    responses is before almost any of the work. Here the clock runs until the
+    last body chunk has been sent, or the app returns or fails without one.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        route = route_template(scope)
+        HTTP_IN_FLIGHT.inc(method, route)
+        started = time.perf_counter()
+        status = "500"
+        recorded = False
+        
+        def record():
+            nonlocal recorded
+            if not recorded:
+                recorded = True
+                HTTP_IN_FLIGHT.dec(method, route)
+                HTTP_REQUEST_SECONDS.observe(method, route, status, value=time.perf_counter() - started)
+        
+        async def send_and_time(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+        
+        try:
+            await self.app(scope, receive, send_and_time)
+        finally:
+            record()
+
+app.add_middleware(RequestMetricsMiddleware)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    check_operator_token(authorization, allow_unset=True)
+    
+    snapshot = GaugeMetric("app_cache_stat", "Session and LLM response cache counters.", ("cache", "stat"))
+    for cache_name, stats in (("session", session_cache.stats()), ("llm", llm_cache.stats())):
+        for stat, value in stats.items():
+            if isinstance(value, (int, float)):
+                snapshot.set(cache_name, stat, value=float(value))
+    jobs = GaugeMetric("deck_jobs", "Deck generation jobs by status.", ("status",))
+    async for row in db.deck_jobs.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+        jobs.set(row["_id"], value=float(row["count"]))
+    return PlainTextResponse(render_metrics([snapshot, jobs]), media_type="text/plain; version=0.0.4")
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Content-Range", "Content-Disposition", "ETag"],
 )
 
 # Configure logging
@@ -577,6 +3984,64 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def bootstrap_indexes():
+    spawn_background(ensure_indexes())
+
+@app.on_event("startup")
+async def run_migrations():
+    if os.environ.get('RUN_MIGRATIONS', 'true').lower() == 'true':
+        spawn_background(migrate_timestamps(int(os.environ.get('MIGRATION_BATCH_SIZE', '500'))))
+        spawn_background(migrate_asset_blobs())
+        spawn_background(backfill_digests())
+
+@app.on_event("startup")
+async def start_llm_cache_reconciler():
+    if llm_cache.enabled:
+        spawn_background(run_periodically(
+            LLM_CACHE_RECONCILE_SECONDS, llm_cache.reconcile_size, "reconcile the LLM cache size", immediately=True
+        ))
+
+@app.on_event("startup")
+async def start_extraction_pipeline():
+    spawn_background(resume_extractions())
+    # Also while running: a crashed pool child or cancelled task leaves its asset "running"
+    spawn_background(run_periodically(EXTRACTION_SWEEP_SECONDS, requeue_stale_extractions, "requeue stale extractions"))
+
+@app.on_event("startup")
+async def start_deck_workers():
+    await requeue_stale_deck_jobs()
+    for worker_id in range(DECK_WORKERS):
+        _deck_workers.append(asyncio.create_task(deck_worker(worker_id)))
+    _deck_workers.append(asyncio.create_task(stale_deck_job_sweeper()))
+
+@app.on_event("startup")
+async def warm_up_llm_provider():
+    # Off by default so workers come up fast; the first deck request pays instead
+    if os.environ.get('LLM_WARM_UP', 'false').lower() == 'true':
+        spawn_background(llm_provider.warm_up())
+
+@app.on_event("startup")
+async def start_auth_service_client():
+    # Created up front so the first logins after a deploy share one pool
+    auth_service.client
+
+@app.on_event("shutdown")
+async def stop_deck_workers():
+    for worker in _deck_workers:
+        worker.cancel()
+    await asyncio.gather(*_deck_workers, return_exceptions=True)
+    _deck_workers.clear()
+
+@app.on_event("shutdown")
+async def shutdown_process_pool():
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+
+@app.on_event("shutdown")
+async def close_auth_service_client():
+    await auth_service.close()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
\ No newline at end of file
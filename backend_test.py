@@ -1,378 +1,380 @@
-import requests
-import sys
+"""Async load harness for the SalesDeck API.
+
+Seeds synthetic users, clients, leads and assets, then drives a weighted mix
+of CRUD and deck routes at a target request rate against a running server and
+reports per-route latency percentiles, error rates and throughput as JSON.
+
+Login goes through the external OAuth service, so users and sessions are
+seeded straight into MongoDB (``--mongo-url``) the same way auth_testing.md
+does by hand. Existing sessions can be reused with ``--session-token``.
+
+    python backend_test.py --base-url http://localhost:8001 \\
+        --mongo-url mongodb://localhost:27017 --db-name salesdeck_db \\
+        --users 5 --rps 50 --duration 30 --mix default --output report.json
+
+Requests are scheduled open-loop: the offered rate stays at ``--rps`` even
+when the server slows down, so tail latency isn't hidden by back-pressure.
+Run the server with LLM_BACKEND=stub to load-test deck generation without
+LLM spend.
+"""
+import argparse
+import asyncio
 import json
-from datetime import datetime
-
-class SalesDeckAPITester:
-    def __init__(self, base_url="https://salesdeck-creator.preview.emergentagent.com"):
-        self.base_url = base_url
-        self.api_url = f"{base_url}/api"
-        self.session_token = "test_session_1762038988870"  # From auth setup
-        self.user_id = "test-user-1762038988870"
-        self.tests_run = 0
-        self.tests_passed = 0
-        self.created_resources = {
-            'clients': [],
-            'assets': [],
-            'leads': [],
-            'decks': []
+import math
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+
+import httpx
+
+MIXES = {
+    "default": {
+        "list_clients": 20, "list_leads": 20, "list_assets": 15, "list_decks": 15,
+        "get_deck": 10, "create_client": 5, "update_lead": 5, "create_asset": 5, "generate_deck": 5,
+    },
+    "read": {
+        "list_clients": 25, "list_leads": 25, "list_assets": 20, "list_decks": 20, "get_deck": 10,
+    },
+    "write": {
+        "create_client": 30, "update_lead": 30, "create_asset": 30, "list_leads": 10,
+    },
+    "decks": {
+        "generate_deck": 50, "list_decks": 25, "get_deck": 25,
+    },
+    # Compare one dashboard call against the four list calls it replaces
+    "overview": {
+        "dashboard": 50, "list_clients": 12, "list_leads": 13, "list_assets": 12, "list_decks": 13,
+    },
+}
+
+WORDS = (
+    "automation pipeline analytics revenue forecasting onboarding compliance security integration "
+    "workflow dashboard healthcare retail logistics banking insurance churn retention reporting"
+).split()
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    # Nearest-rank percentile
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class RouteStats:
+    def __init__(self):
+        self.latencies_ms = []
+        self.errors = 0
+        self.status_codes = defaultdict(int)
+
+    def record(self, latency_ms, status_code, ok):
+        self.latencies_ms.append(latency_ms)
+        self.status_codes[str(status_code)] += 1
+        if not ok:
+            self.errors += 1
+
+    def report(self, elapsed):
+        ordered = sorted(self.latencies_ms)
+        count = len(ordered)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "throughput_per_s": round(count / elapsed, 2) if elapsed else None,
+            "p50_ms": round(percentile(ordered, 0.50), 2) if count else None,
+            "p95_ms": round(percentile(ordered, 0.95), 2) if count else None,
+            "p99_ms": round(percentile(ordered, 0.99), 2) if count else None,
+            "max_ms": round(ordered[-1], 2) if count else None,
+            "status_codes": dict(self.status_codes),
         }
 
-    def run_test(self, name, method, endpoint, expected_status, data=None, headers=None):
-        """Run a single API test"""
-        url = f"{self.api_url}/{endpoint}"
-        test_headers = {'Content-Type': 'application/json'}
-        
-        # Use cookies for authentication (backend expects cookies)
-        cookies = {}
-        if self.session_token:
-            cookies['session_token'] = self.session_token
-        
-        if headers:
-            test_headers.update(headers)
-
-        self.tests_run += 1
-        print(f"\n🔍 Testing {name}...")
-        print(f"   URL: {url}")
-        
+
+class VirtualUser:
+    """One seeded account and the ids it has created so far."""
+
+    def __init__(self, user_id, session_token):
+        self.user_id = user_id
+        self.session_token = session_token
+        self.clients = []
+        self.leads = []
+        self.decks = []
+
+    @property
+    def headers(self):
+        return {"Authorization": f"Bearer {self.session_token}"}
+
+
+class LoadHarness:
+    def __init__(self, args):
+        self.args = args
+        self.api_url = f"{args.base_url.rstrip('/')}/api"
+        self.rng = random.Random(args.seed)
+        self.mix = MIXES[args.mix]
+        self.users = []
+        self.stats = defaultdict(RouteStats)
+        self.dropped = 0
+        self.seeded_user_ids = []
+        self.http = None
+        self.job_tasks = set()
+
+    # Seeding
+    async def seed_sessions(self):
+        for token in self.args.session_token or []:
+            self.users.append(VirtualUser(None, token))
+        if not self.args.mongo_url:
+            if not self.users:
+                sys.exit("Pass --mongo-url to seed users or --session-token to reuse existing sessions")
+            return
+
+        from motor.motor_asyncio import AsyncIOMotorClient
+        mongo = AsyncIOMotorClient(self.args.mongo_url)
+        db = mongo[self.args.db_name]
+        now = datetime.now(timezone.utc)
+        for _ in range(self.args.users):
+            suffix = uuid.uuid4().hex[:12]
+            user_id = f"load-user-{suffix}"
+            token = f"load_session_{suffix}"
+            await db.users.insert_one({
+                "id": user_id,
+                "email": f"load.{suffix}@example.com",
+                "name": f"Load User {suffix}",
+                "picture": "https://via.placeholder.com/150",
+                "created_at": now,
+            })
+            await db.user_sessions.insert_one({
+                "user_id": user_id,
+                "session_token": token,
+                "expires_at": now + timedelta(hours=6),
+                "created_at": now,
+            })
+            self.seeded_user_ids.append(user_id)
+            self.users.append(VirtualUser(user_id, token))
+        mongo.close()
+
+    async def seed_data(self):
+        for user in self.users:
+            for _ in range(self.args.seed_clients):
+                response = await self.http.post("/clients", headers=user.headers, json={
+                    "name": f"Client {uuid.uuid4().hex[:6]}",
+                    "industry": self.rng.choice(WORDS),
+                    "description": sentence(self.rng, 20),
+                })
+                response.raise_for_status()
+                user.clients.append(response.json()["id"])
+            for _ in range(self.args.seed_leads):
+                response = await self.http.post("/leads", headers=user.headers, json={
+                    "client_id": self.rng.choice(user.clients),
+                    "project_scope": sentence(self.rng, 25),
+                    "notes": sentence(self.rng, 15),
+                })
+                response.raise_for_status()
+                user.leads.append(response.json()["id"])
+            for n in range(self.args.seed_assets):
+                response = await self.http.post("/assets", headers=user.headers, json={
+                    "type": "product_description" if n % 2 else "use_case",
+                    "name": f"Asset {n}",
+                    "content": " ".join(sentence(self.rng, 20) for _ in range(10)),
+                })
+                response.raise_for_status()
+
+    async def cleanup(self):
+        if not self.args.mongo_url or not self.seeded_user_ids:
+            return
+        from motor.motor_asyncio import AsyncIOMotorClient
+        mongo = AsyncIOMotorClient(self.args.mongo_url)
+        db = mongo[self.args.db_name]
+        owned = {"user_id": {"$in": self.seeded_user_ids}}
+        for collection in ("clients", "leads", "assets", "sales_decks", "deck_jobs", "user_sessions"):
+            await db[collection].delete_many(owned)
+        await db.users.delete_many({"id": {"$in": self.seeded_user_ids}})
+        mongo.close()
+
+    # Operations
+    async def timed(self, route, method, path, user, **kwargs):
+        started = time.perf_counter()
         try:
-            if method == 'GET':
-                response = requests.get(url, headers=test_headers, cookies=cookies)
-            elif method == 'POST':
-                response = requests.post(url, json=data, headers=test_headers, cookies=cookies)
-            elif method == 'DELETE':
-                response = requests.delete(url, headers=test_headers, cookies=cookies)
-            elif method == 'PATCH':
-                response = requests.patch(url, json=data, headers=test_headers, cookies=cookies)
-
-            success = response.status_code == expected_status
-            if success:
-                self.tests_passed += 1
-                print(f"✅ Passed - Status: {response.status_code}")
-                try:
-                    return success, response.json()
-                except:
-                    return success, {}
-            else:
-                print(f"❌ Failed - Expected {expected_status}, got {response.status_code}")
-                try:
-                    error_detail = response.json()
-                    print(f"   Error: {error_detail}")
-                except:
-                    print(f"   Response: {response.text}")
-                return False, {}
-
-        except Exception as e:
-            print(f"❌ Failed - Error: {str(e)}")
-            return False, {}
-
-    def test_auth_endpoints(self):
-        """Test authentication endpoints"""
-        print("\n" + "="*50)
-        print("TESTING AUTHENTICATION ENDPOINTS")
-        print("="*50)
-        
-        # Test /auth/me
-        success, user_data = self.run_test(
-            "Get Current User",
-            "GET",
-            "auth/me",
-            200
-        )
-        
-        if success:
-            print(f"   User: {user_data.get('name')} ({user_data.get('email')})")
-        
-        return success
-
-    def test_client_endpoints(self):
-        """Test client CRUD operations"""
-        print("\n" + "="*50)
-        print("TESTING CLIENT ENDPOINTS")
-        print("="*50)
-        
-        # Test create client
-        client_data = {
-            "name": "Test Corp",
-            "industry": "Technology",
-            "description": "A test technology company for API testing"
-        }
-        
-        success, client = self.run_test(
-            "Create Client",
-            "POST",
-            "clients",
-            200,
-            data=client_data
-        )
-        
-        if success and client.get('id'):
-            self.created_resources['clients'].append(client['id'])
-            print(f"   Created client ID: {client['id']}")
-        
-        # Test get clients
-        success, clients = self.run_test(
-            "Get Clients",
-            "GET",
-            "clients",
-            200
-        )
-        
-        if success:
-            print(f"   Found {len(clients)} clients")
-        
-        return len(self.created_resources['clients']) > 0
-
-    def test_asset_endpoints(self):
-        """Test asset CRUD operations"""
-        print("\n" + "="*50)
-        print("TESTING ASSET ENDPOINTS")
-        print("="*50)
-        
-        # Test create product description asset
-        asset_data = {
-            "type": "product_description",
-            "name": "AI Sales Platform",
-            "content": "Our AI-powered sales platform helps B2B SaaS companies generate personalized sales presentations in minutes, saving 10-15 hours per week and accelerating sales cycles by 40%."
-        }
-        
-        success, asset = self.run_test(
-            "Create Product Description Asset",
-            "POST",
-            "assets",
-            200,
-            data=asset_data
-        )
-        
-        if success and asset.get('id'):
-            self.created_resources['assets'].append(asset['id'])
-            print(f"   Created asset ID: {asset['id']}")
-        
-        # Test create use case asset
-        use_case_data = {
-            "type": "use_case",
-            "name": "Healthcare Industry Use Case",
-            "content": "Healthcare organizations use our platform to create HIPAA-compliant sales presentations for medical device sales, reducing preparation time by 75% while ensuring regulatory compliance."
-        }
-        
-        success, asset = self.run_test(
-            "Create Use Case Asset",
-            "POST",
-            "assets",
-            200,
-            data=use_case_data
-        )
-        
-        if success and asset.get('id'):
-            self.created_resources['assets'].append(asset['id'])
-        
-        # Test get assets
-        success, assets = self.run_test(
-            "Get All Assets",
-            "GET",
-            "assets",
-            200
-        )
-        
-        if success:
-            print(f"   Found {len(assets)} assets")
-        
-        # Test get assets by type
-        success, product_assets = self.run_test(
-            "Get Product Description Assets",
-            "GET",
-            "assets?asset_type=product_description",
-            200
-        )
-        
-        if success:
-            print(f"   Found {len(product_assets)} product description assets")
-        
-        return len(self.created_resources['assets']) > 0
-
-    def test_lead_endpoints(self):
-        """Test lead CRUD operations"""
-        print("\n" + "="*50)
-        print("TESTING LEAD ENDPOINTS")
-        print("="*50)
-        
-        if not self.created_resources['clients']:
-            print("❌ No clients available for lead creation")
-            return False
-        
-        # Test create lead
-        lead_data = {
-            "client_id": self.created_resources['clients'][0],
-            "project_scope": "Implement AI-powered sales deck generation system for their B2B SaaS sales team. Need to integrate with existing CRM and support 50+ sales reps.",
-            "notes": "High priority client. Decision maker is VP of Sales. Budget approved for Q1. Looking for 3-month implementation timeline."
-        }
-        
-        success, lead = self.run_test(
-            "Create Lead",
-            "POST",
-            "leads",
-            200,
-            data=lead_data
-        )
-        
-        if success and lead.get('id'):
-            self.created_resources['leads'].append(lead['id'])
-            print(f"   Created lead ID: {lead['id']}")
-            print(f"   Client: {lead.get('client_name')}")
-        
-        # Test get leads
-        success, leads = self.run_test(
-            "Get Leads",
-            "GET",
-            "leads",
-            200
-        )
-        
-        if success:
-            print(f"   Found {len(leads)} leads")
-        
-        # Test update lead status
-        if self.created_resources['leads']:
-            success, _ = self.run_test(
-                "Update Lead Status",
-                "PATCH",
-                f"leads/{self.created_resources['leads'][0]}?status=won",
-                200
-            )
-        
-        return len(self.created_resources['leads']) > 0
-
-    def test_deck_generation(self):
-        """Test AI deck generation"""
-        print("\n" + "="*50)
-        print("TESTING DECK GENERATION")
-        print("="*50)
-        
-        if not self.created_resources['leads']:
-            print("❌ No leads available for deck generation")
-            return False
-        
-        # Test generate deck
-        deck_data = {
-            "lead_id": self.created_resources['leads'][0]
+            response = await self.http.request(method, path, headers=user.headers, **kwargs)
+        except httpx.HTTPError:
+            self.stats[route].record((time.perf_counter() - started) * 1000, "error", False)
+            return None
+        self.stats[route].record((time.perf_counter() - started) * 1000, response.status_code, response.is_success)
+        return response if response.is_success else None
+
+    async def list_clients(self, user):
+        await self.timed("GET /clients", "GET", "/clients", user)
+
+    async def list_leads(self, user):
+        await self.timed("GET /leads", "GET", "/leads", user)
+
+    async def list_assets(self, user):
+        await self.timed("GET /assets", "GET", "/assets", user)
+
+    async def list_decks(self, user):
+        response = await self.timed("GET /decks", "GET", "/decks", user)
+        if response is not None and not user.decks:
+            user.decks = [deck["id"] for deck in response.json()][:50]
+
+    async def dashboard(self, user):
+        await self.timed("GET /dashboard", "GET", "/dashboard", user)
+
+    async def get_deck(self, user):
+        if not user.decks:
+            return await self.list_decks(user)
+        await self.timed("GET /decks/{id}", "GET", f"/decks/{self.rng.choice(user.decks)}", user)
+
+    async def create_client(self, user):
+        response = await self.timed("POST /clients", "POST", "/clients", user, json={
+            "name": f"Client {uuid.uuid4().hex[:6]}",
+            "industry": self.rng.choice(WORDS),
+            "description": sentence(self.rng, 20),
+        })
+        if response is not None:
+            user.clients.append(response.json()["id"])
+
+    async def update_lead(self, user):
+        if not user.leads:
+            return await self.list_leads(user)
+        await self.timed("PATCH /leads/{id}", "PATCH", f"/leads/{self.rng.choice(user.leads)}", user, json={
+            "notes": sentence(self.rng, 15),
+        })
+
+    async def create_asset(self, user):
+        await self.timed("POST /assets", "POST", "/assets", user, json={
+            "type": self.rng.choice(["product_description", "use_case"]),
+            "name": f"Asset {uuid.uuid4().hex[:6]}",
+            "content": " ".join(sentence(self.rng, 20) for _ in range(5)),
+        })
+
+    async def generate_deck(self, user):
+        if not user.leads:
+            return await self.list_leads(user)
+        started = time.perf_counter()
+        response = await self.timed("POST /decks/generate", "POST", "/decks/generate", user, json={
+            "lead_id": self.rng.choice(user.leads),
+        })
+        if response is not None:
+            task = asyncio.create_task(self.follow_job(user, response.json()["id"], started))
+            self.job_tasks.add(task)
+            task.add_done_callback(self.job_tasks.discard)
+
+    async def follow_job(self, user, job_id, started):
+        """Poll a deck job to completion and record its end-to-end latency."""
+        deadline = started + self.args.job_timeout
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(self.args.job_poll_interval)
+            response = await self.timed("GET /decks/jobs/{id}", "GET", f"/decks/jobs/{job_id}", user)
+            if response is None:
+                continue
+            job = response.json()
+            if job["status"] in ("succeeded", "failed"):
+                ok = job["status"] == "succeeded"
+                self.stats["deck job (end to end)"].record((time.perf_counter() - started) * 1000, job["status"], ok)
+                if ok and job.get("deck_id"):
+                    user.decks.append(job["deck_id"])
+                return
+        self.stats["deck job (end to end)"].record((time.perf_counter() - started) * 1000, "timeout", False)
+
+    # Driver
+    async def drive(self):
+        operations = list(self.mix)
+        weights = [self.mix[name] for name in operations]
+        total = int(self.args.rps * self.args.duration)
+        interval = 1.0 / self.args.rps
+        in_flight = set()
+
+        started = time.perf_counter()
+        for n in range(total):
+            delay = started + n * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= self.args.max_in_flight:
+                self.dropped += 1
+                continue
+            operation = getattr(self, self.rng.choices(operations, weights)[0])
+            task = asyncio.create_task(operation(self.rng.choice(self.users)))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        await asyncio.gather(*in_flight, return_exceptions=True)
+        elapsed = time.perf_counter() - started
+        if self.job_tasks:
+            await asyncio.gather(*list(self.job_tasks), return_exceptions=True)
+        return elapsed
+
+    async def run(self):
+        limits = httpx.Limits(max_connections=self.args.max_in_flight, max_keepalive_connections=self.args.max_in_flight)
+        timeout = httpx.Timeout(self.args.request_timeout)
+        async with httpx.AsyncClient(base_url=self.api_url, limits=limits, timeout=timeout) as http:
+            self.http = http
+            await self.seed_sessions()
+            try:
+                await self.seed_data()
+                elapsed = await self.drive()
+            finally:
+                if self.args.cleanup:
+                    await self.cleanup()
+
+        requests = sum(len(stats.latencies_ms) for stats in self.stats.values())
+        errors = sum(stats.errors for stats in self.stats.values())
+        return {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "base_url": self.args.base_url,
+            "mix": self.args.mix,
+            "target_rps": self.args.rps,
+            "duration_s": round(elapsed, 3),
+            "users": len(self.users),
+            "totals": {
+                "requests": requests,
+                "errors": errors,
+                "error_rate": round(errors / requests, 4) if requests else 0.0,
+                "throughput_per_s": round(requests / elapsed, 2) if elapsed else None,
+                "dropped": self.dropped,
+            },
+            "routes": {route: stats.report(elapsed) for route, stats in sorted(self.stats.items())},
         }
-        
-        print("   🤖 Generating AI sales deck (this may take 10-30 seconds)...")
-        success, deck = self.run_test(
-            "Generate Sales Deck",
-            "POST",
-            "decks/generate",
-            200,
-            data=deck_data
-        )
-        
-        if success and deck.get('id'):
-            self.created_resources['decks'].append(deck['id'])
-            print(f"   Created deck ID: {deck['id']}")
-            print(f"   Deck title: {deck.get('content', {}).get('title', 'N/A')}")
-            slides = deck.get('content', {}).get('slides', [])
-            print(f"   Number of slides: {len(slides)}")
-            
-            # Print slide types
-            if slides:
-                slide_types = [slide.get('type', 'unknown') for slide in slides]
-                print(f"   Slide types: {', '.join(slide_types)}")
-        
-        # Test get decks
-        success, decks = self.run_test(
-            "Get All Decks",
-            "GET",
-            "decks",
-            200
-        )
-        
-        if success:
-            print(f"   Found {len(decks)} decks")
-        
-        # Test get specific deck
-        if self.created_resources['decks']:
-            success, deck_detail = self.run_test(
-                "Get Specific Deck",
-                "GET",
-                f"decks/{self.created_resources['decks'][0]}",
-                200
-            )
-            
-            if success:
-                print(f"   Retrieved deck: {deck_detail.get('content', {}).get('title', 'N/A')}")
-        
-        return len(self.created_resources['decks']) > 0
-
-    def test_logout(self):
-        """Test logout functionality"""
-        print("\n" + "="*50)
-        print("TESTING LOGOUT")
-        print("="*50)
-        
-        success, _ = self.run_test(
-            "Logout",
-            "POST",
-            "auth/logout",
-            200
-        )
-        
-        return success
-
-    def cleanup_resources(self):
-        """Clean up created test resources"""
-        print("\n" + "="*50)
-        print("CLEANING UP TEST RESOURCES")
-        print("="*50)
-        
-        # Delete leads
-        for lead_id in self.created_resources['leads']:
-            self.run_test(f"Delete Lead {lead_id}", "DELETE", f"leads/{lead_id}", 200)
-        
-        # Delete assets
-        for asset_id in self.created_resources['assets']:
-            self.run_test(f"Delete Asset {asset_id}", "DELETE", f"assets/{asset_id}", 200)
-        
-        # Delete clients
-        for client_id in self.created_resources['clients']:
-            self.run_test(f"Delete Client {client_id}", "DELETE", f"clients/{client_id}", 200)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Async load harness for the SalesDeck API")
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--mongo-url", help="Seed users and sessions directly into this MongoDB")
+    parser.add_argument("--db-name", default="salesdeck_db")
+    parser.add_argument("--session-token", action="append", help="Reuse an existing session (repeatable)")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--seed-clients", type=int, default=5)
+    parser.add_argument("--seed-leads", type=int, default=10)
+    parser.add_argument("--seed-assets", type=int, default=10)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="default")
+    parser.add_argument("--rps", type=float, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load")
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    parser.add_argument("--request-timeout", type=float, default=30)
+    parser.add_argument("--job-timeout", type=float, default=120)
+    parser.add_argument("--job-poll-interval", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--cleanup", action="store_true", help="Delete seeded users and their data afterwards")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    return parser.parse_args()
+
 
 def main():
-    print("🚀 Starting Sales Deck API Testing")
-    print(f"Backend URL: https://salesdeck-creator.preview.emergentagent.com")
-    
-    tester = SalesDeckAPITester()
-    
-    # Run all tests
-    auth_success = tester.test_auth_endpoints()
-    if not auth_success:
-        print("\n❌ Authentication failed - stopping tests")
-        return 1
-    
-    client_success = tester.test_client_endpoints()
-    asset_success = tester.test_asset_endpoints()
-    lead_success = tester.test_lead_endpoints()
-    deck_success = tester.test_deck_generation()
-    logout_success = tester.test_logout()
-    
-    # Cleanup
-    tester.cleanup_resources()
-    
-    # Print final results
-    print("\n" + "="*60)
-    print("FINAL TEST RESULTS")
-    print("="*60)
-    print(f"📊 Tests passed: {tester.tests_passed}/{tester.tests_run}")
-    print(f"🔐 Authentication: {'✅' if auth_success else '❌'}")
-    print(f"👥 Clients CRUD: {'✅' if client_success else '❌'}")
-    print(f"📄 Assets CRUD: {'✅' if asset_success else '❌'}")
-    print(f"🎯 Leads CRUD: {'✅' if lead_success else '❌'}")
-    print(f"🤖 AI Deck Generation: {'✅' if deck_success else '❌'}")
-    print(f"🚪 Logout: {'✅' if logout_success else '❌'}")
-    
-    success_rate = (tester.tests_passed / tester.tests_run) * 100 if tester.tests_run > 0 else 0
-    print(f"\n🎯 Overall Success Rate: {success_rate:.1f}%")
-    
-    return 0 if success_rate >= 80 else 1
+    args = parse_args()
+    report = asyncio.run(LoadHarness(args).run())
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(payload + "\n")
+    else:
+        print(payload)
+    return 1 if report["totals"]["errors"] else 0
+
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
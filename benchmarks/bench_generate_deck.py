@@ -0,0 +1,204 @@
+"""Benchmark deck generation end to end without network access or LLM spend.
+
+Runs the real generation path in ``backend/server.py`` (prompt assembly,
+streamed parsing, persistence) against the deterministic stub LLM provider
+and a local Mongo stand-in, then prints per-stage and end-to-end timings as
+JSON.
+
+    python benchmarks/bench_generate_deck.py --leads 50 --assets 200 --concurrency 8
+    python benchmarks/bench_generate_deck.py --mongo-url mongodb://localhost:27017
+
+Without ``--mongo-url`` the in-memory ``mongomock-motor`` package is used; it
+is pinned in ``backend/requirements-dev.txt`` with the other test-only packages.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+VOCABULARY = (
+    "automation pipeline analytics revenue forecasting onboarding compliance security integration "
+    "workflow dashboard healthcare retail logistics banking insurance manufacturing churn retention "
+    "reporting scalability latency api migration support training partner pricing roi efficiency"
+).split()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mongo-url", help="Use a real MongoDB instead of mongomock-motor")
+    parser.add_argument("--db-name", default=f"bench_{uuid.uuid4().hex[:8]}")
+    parser.add_argument("--leads", type=int, default=50)
+    parser.add_argument("--assets", type=int, default=200)
+    parser.add_argument("--asset-words", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency-ms", type=float, default=0)
+    parser.add_argument("--llm-chunk-delay-ms", type=float, default=0)
+    parser.add_argument("--llm-chunk-chars", type=int, default=64)
+    parser.add_argument("--llm-slides", type=int, default=8)
+    parser.add_argument("--llm-padding-chars", type=int, default=0)
+    parser.add_argument("--no-stream", action="store_true", help="Stub replies arrive as one chunk")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def load_server(args):
+    os.environ.setdefault("MONGO_URL", args.mongo_url or "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", args.db_name)
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["STUB_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["STUB_LLM_CHUNK_DELAY_MS"] = str(args.llm_chunk_delay_ms)
+    os.environ["STUB_LLM_CHUNK_CHARS"] = str(args.llm_chunk_chars)
+    os.environ["STUB_LLM_SLIDES"] = str(args.llm_slides)
+    os.environ["STUB_LLM_PADDING_CHARS"] = str(args.llm_padding_chars)
+    os.environ["STUB_LLM_STREAM"] = "false" if args.no_stream else "true"
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        server.db = AsyncIOMotorClient(args.mongo_url, tz_aware=True)[args.db_name]
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        server.db = AsyncMongoMockClient(tz_aware=True)[args.db_name]
+    return server
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    if not ordered:
+        return {}
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+async def seed(server, args, rng):
+    user_id = f"bench-user-{uuid.uuid4().hex[:8]}"
+    clients = [
+        server.Client(
+            user_id=user_id,
+            name=f"Client {n}",
+            industry=rng.choice(VOCABULARY),
+            description=" ".join(rng.choices(VOCABULARY, k=30)),
+        ).model_dump()
+        for n in range(max(1, args.leads // 2))
+    ]
+    await server.db.clients.insert_many(clients)
+
+    leads = []
+    for n in range(args.leads):
+        client = clients[n % len(clients)]
+        leads.append(server.Lead(
+            user_id=user_id,
+            client_id=client["id"],
+            client_name=client["name"],
+            project_scope=" ".join(rng.choices(VOCABULARY, k=20)),
+            notes=" ".join(rng.choices(VOCABULARY, k=20)),
+        ).model_dump())
+    await server.db.leads.insert_many(leads)
+
+    assets = [
+        server.Asset(
+            user_id=user_id,
+            type=rng.choice(server.DECK_ASSET_TYPES),
+            name=f"Asset {n}",
+            content="\n\n".join(
+                " ".join(rng.choices(VOCABULARY, k=80)) for _ in range(max(1, args.asset_words // 80))
+            ),
+        ).model_dump()
+        for n in range(args.assets)
+    ]
+    if assets:
+        await server.db.assets.insert_many(assets)
+    return user_id, leads
+
+
+async def measure_stages(server, user_id, leads):
+    stages = {"context": [], "prompt": [], "llm": [], "parse": [], "persist": []}
+    prompt_chars = []
+    for lead in leads:
+        started = time.perf_counter()
+        lead_doc, client, sections = await server.load_deck_inputs(user_id, lead["id"])
+        stages["context"].append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        prompt = server.build_deck_prompt(lead_doc, client, sections)
+        stages["prompt"].append((time.perf_counter() - started) * 1000)
+        prompt_chars.append(len(prompt))
+
+        started = time.perf_counter()
+        chunks = [chunk async for chunk in server.llm_provider.stream(server.DECK_SYSTEM_MESSAGE, prompt, "bench")]
+        stages["llm"].append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        parser = server.SlideStreamParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+        content = server.parse_deck_response(parser.text, client, parser)
+        stages["parse"].append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await server.save_deck(user_id, lead_doc, content)
+        stages["persist"].append((time.perf_counter() - started) * 1000)
+
+    result = {name: summarize(samples) for name, samples in stages.items()}
+    result["prompt_chars"] = {"mean": round(statistics.fmean(prompt_chars), 1), "max": max(prompt_chars)}
+    return result
+
+
+async def measure_end_to_end(server, user_id, leads, concurrency, force_refresh):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(lead):
+        async with semaphore:
+            started = time.perf_counter()
+            await server.build_deck(user_id, lead["id"], force_refresh=force_refresh)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(lead) for lead in leads))
+    elapsed = time.perf_counter() - started
+    return {**summarize(latencies), "throughput_per_s": round(len(leads) / elapsed, 2) if elapsed else None}
+
+
+async def main():
+    args = parse_args()
+    server = load_server(args)
+    rng = random.Random(args.seed)
+    user_id, leads = await seed(server, args, rng)
+
+    started = time.perf_counter()
+    await server.asset_indexes.get(user_id)
+    index_build_ms = (time.perf_counter() - started) * 1000
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "mongo_url"},
+        "mongo": "motor" if args.mongo_url else "mongomock-motor",
+        "llm_provider": server.llm_provider.model_id,
+        "index_build_ms": round(index_build_ms, 3),
+        "stages": await measure_stages(server, user_id, leads),
+        "end_to_end_uncached": await measure_end_to_end(server, user_id, leads, args.concurrency, True),
+        "end_to_end_cached": await measure_end_to_end(server, user_id, leads, args.concurrency, False),
+        "llm_cache": server.llm_cache.stats(),
+    }
+
+    if args.mongo_url:
+        await server.db.client.drop_database(args.db_name)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+"""Benchmark list-response serialization on large synthetic result sets.
+
+Compares three ways of turning a page of Mongo documents into a response body:
+
+* ``validated_json``: what a ``response_model=List[...]`` route does with the
+  stdlib encoder (validate every document, dump to JSON-able data, json.dumps)
+* ``validated_orjson``: the same validation, encoded with orjson
+* ``trusted_orjson``: the list routes' path, encoding documents as-is
+
+and prints time and peak traced memory per strategy as JSON.
+
+    python benchmarks/bench_serialization.py --rows 1000 --repeat 20
+    python benchmarks/bench_serialization.py --collections decks --slides 12 --padding-chars 400
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+VOCABULARY = (
+    "automation pipeline analytics revenue forecasting onboarding compliance security integration "
+    "workflow dashboard healthcare retail logistics banking insurance manufacturing churn retention "
+    "reporting scalability latency api migration support training partner pricing roi efficiency"
+).split()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1000, help="Documents per response (MAX_PAGE_SIZE is 1000)")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--collections", nargs="+", default=["clients", "leads", "decks"],
+                        choices=["clients", "leads", "decks"])
+    parser.add_argument("--slides", type=int, default=10)
+    parser.add_argument("--padding-chars", type=int, default=0, help="Extra text per deck slide")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def load_server():
+    # Importing doesn't connect; Motor only dials out on the first query
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "bench_serialization")
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    return server
+
+
+def phrase(rng, n):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(n))
+
+
+def make_docs(kind, args, rng):
+    """Documents shaped like the list routes' projections, as Motor returns them."""
+    now = datetime.now(timezone.utc)
+    user_id = str(uuid.uuid4())
+    docs = []
+    for n in range(args.rows):
+        doc = {"id": str(uuid.uuid4()), "user_id": user_id, "created_at": now - timedelta(seconds=n)}
+        if kind == "clients":
+            doc.update(name=phrase(rng, 2).title(), industry=rng.choice(VOCABULARY), description=phrase(rng, 30))
+        elif kind == "leads":
+            doc.update(client_id=str(uuid.uuid4()), client_name=phrase(rng, 2).title(),
+                       project_scope=phrase(rng, 25), notes=phrase(rng, 15), status=rng.choice(["active", "won", "lost"]))
+        else:
+            padding = phrase(rng, max(1, args.padding_chars // 6))[:args.padding_chars] if args.padding_chars else ""
+            slides = []
+            for s in range(args.slides):
+                slides.append({
+                    "type": rng.choice(["problem", "solution", "features", "roi"]),
+                    "title": phrase(rng, 3).title(),
+                    "description": f"{phrase(rng, 12)} {padding}".strip(),
+                    "points": [phrase(rng, 8) for _ in range(3)],
+                    "features": [{"name": phrase(rng, 2), "description": phrase(rng, 10)} for _ in range(2)],
+                    "metrics": [{"label": phrase(rng, 2), "value": f"{rng.randint(10, 300)}%"}],
+                })
+            doc.update(lead_id=str(uuid.uuid4()), lead_name=phrase(rng, 2).title(), version=1,
+                       content={"title": phrase(rng, 4).title(), "slides": slides})
+        docs.append(doc)
+    return docs
+
+
+def strategies(model):
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    adapter = TypeAdapter(List[model])
+
+    def validated(docs):
+        # Mirrors FastAPI's serialize_response for a response_model route
+        return jsonable_encoder(adapter.dump_python(adapter.validate_python(docs), mode="json"))
+
+    return {
+        "validated_json": lambda docs: JSONResponse(validated(docs)).body,
+        "validated_orjson": lambda docs: ORJSONResponse(validated(docs)).body,
+        "trusted_orjson": lambda docs: ORJSONResponse(docs).body,
+    }
+
+
+def measure(encode, docs, repeat):
+    encode(docs)  # warm up
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(encode(docs))
+        samples.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    encode(docs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "peak_kib": round(peak / 1024, 1),
+        "body_kib": round(size / 1024, 1),
+    }
+
+
+def main():
+    args = parse_args()
+    server = load_server()
+    rng = random.Random(args.seed)
+    models = {"clients": server.Client, "leads": server.Lead, "decks": server.SalesDeck}
+
+    report = {"rows": args.rows, "repeat": args.repeat, "results": {}}
+    for kind in args.collections:
+        docs = make_docs(kind, args, rng)
+        results = {name: measure(encode, docs, args.repeat) for name, encode in strategies(models[kind]).items()}
+        baseline = results["validated_json"]["mean_ms"]
+        for result in results.values():
+            result["speedup"] = round(baseline / result["mean_ms"], 2) if result["mean_ms"] else None
+        report["results"][kind] = results
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Benchmark server cold start: import time, time-to-ready and resident memory.
+
+Three measurements, each repeated ``--runs`` times in fresh interpreters:
+
+* ``import``: ``import server`` alone, with the process's peak RSS afterwards
+* ``ready``: a uvicorn worker from spawn until ``--ready-path`` answers, with
+  its RSS once ready (and again after ``--settle`` seconds, which catches
+  background warm-up such as ``LLM_WARM_UP=true``)
+* ``profile``: the slowest top-level imports from ``python -X importtime``
+
+The ready check needs startup hooks to finish, which needs MongoDB.
+
+    python benchmarks/bench_startup.py --mongo-url mongodb://localhost:27017
+    python benchmarks/bench_startup.py --warm-up --settle 5
+    python benchmarks/bench_startup.py --skip-ready --top 30
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+RSS_SNIPPET = (
+    "import resource, sys, time; started = time.perf_counter(); import server; "
+    "elapsed = time.perf_counter() - started; "
+    "print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, 'emergentintegrations' in sys.modules)"
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default="bench_startup")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Imports to list in the profile")
+    parser.add_argument("--ready-path", default="/docs")
+    parser.add_argument("--ready-timeout", type=float, default=60)
+    parser.add_argument("--settle", type=float, default=0, help="Seconds to wait before a second RSS sample")
+    parser.add_argument("--warm-up", action="store_true", help="Start workers with LLM_WARM_UP=true")
+    parser.add_argument("--skip-ready", action="store_true", help="Only measure imports")
+    return parser.parse_args()
+
+
+def server_env(args):
+    env = dict(os.environ)
+    env.update(
+        MONGO_URL=args.mongo_url,
+        DB_NAME=args.db_name,
+        LLM_WARM_UP="true" if args.warm_up else "false",
+        RUN_MIGRATIONS="false",
+        DECK_WORKERS="1",
+    )
+    return env
+
+
+def summarize(values, digits=3):
+    return {
+        "mean": round(statistics.fmean(values), digits),
+        "min": round(min(values), digits),
+        "max": round(max(values), digits),
+    }
+
+
+def rss_mib(pid):
+    # Linux only; other platforms report None
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def measure_import(args):
+    seconds, rss, loaded = [], [], []
+    for _ in range(args.runs):
+        out = subprocess.run(
+            [sys.executable, "-c", RSS_SNIPPET], cwd=BACKEND_DIR, env=server_env(args),
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        seconds.append(float(out[0]))
+        # ru_maxrss is KiB on Linux
+        rss.append(int(out[1]) / 1024)
+        loaded.append(out[2] == "True")
+    return {"seconds": summarize(seconds), "peak_rss_mib": summarize(rss, 1), "llm_stack_loaded": any(loaded)}
+
+
+def profile_imports(args):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"], cwd=BACKEND_DIR, env=server_env(args),
+        capture_output=True, text=True, check=True
+    )
+    top_level = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        # Nested imports are indented under their parent
+        if name.startswith("  ") or name.strip() == "server":
+            continue
+        top_level.append({"module": name.strip(), "cumulative_ms": round(int(cumulative_us) / 1000, 1)})
+    top_level.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return top_level[:args.top]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_ready(args):
+    seconds, ready_rss, settled_rss = [], [], []
+    for _ in range(args.runs):
+        port = free_port()
+        url = f"http://127.0.0.1:{port}{args.ready_path}"
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=server_env(args)
+        )
+        try:
+            while True:
+                if process.poll() is not None:
+                    sys.exit(f"uvicorn exited with {process.returncode} before becoming ready")
+                if time.perf_counter() - started > args.ready_timeout:
+                    sys.exit(f"{url} not ready after {args.ready_timeout}s")
+                try:
+                    with urllib.request.urlopen(url, timeout=1) as response:
+                        if response.status == 200:
+                            break
+                except (urllib.error.URLError, ConnectionError, TimeoutError):
+                    time.sleep(0.02)
+            seconds.append(time.perf_counter() - started)
+            ready_rss.append(rss_mib(process.pid))
+            if args.settle:
+                time.sleep(args.settle)
+                settled_rss.append(rss_mib(process.pid))
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {"seconds": summarize(seconds)}
+    if None not in ready_rss:
+        report["rss_mib"] = summarize(ready_rss, 1)
+    if settled_rss and None not in settled_rss:
+        report["settled_rss_mib"] = summarize(settled_rss, 1)
+    return report
+
+
+def main():
+    args = parse_args()
+    report = {
+        "runs": args.runs,
+        "warm_up": args.warm_up,
+        "import": measure_import(args),
+        "profile": profile_imports(args),
+    }
+    if not args.skip_ready:
+        report["ready"] = measure_ready(args)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,10 +13,12 @@ import { Label } from "@/components/ui/label";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
 import { Dialog, DialogContent, DialogDescription, DialogHeader, DialogTitle, DialogTrigger, DialogFooter } from "@/components/ui/dialog";
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@/components/ui/table";
-import { Loader2, Plus, Trash2, FileText, Briefcase, Users, TrendingUp, Presentation, LogOut, Sparkles, Edit, Upload, File } from "lucide-react";
+import { Loader2, Plus, Trash2, FileText, Briefcase, Users, TrendingUp, Presentation, LogOut, Sparkles, Edit, Upload, File, Download } from "lucide-react";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+// Largest page the list endpoints accept (MAX_PAGE_SIZE on the backend)
+const PAGE_SIZE = 1000;
 
 const axiosInstance = axios.create({
   baseURL: API,
@@ -166,6 +168,7 @@ function Dashboard() {
   const [assetFile, setAssetFile] = useState(null);
   const [generating, setGenerating] = useState(false);
   const [selectedDeck, setSelectedDeck] = useState(null);
+  const [regeneratingSlide, setRegeneratingSlide] = useState(null);
 
   useEffect(() => {
     fetchUser();
@@ -188,18 +191,31 @@ function Dashboard() {
     }
   };
 
+  // List endpoints are paginated; follow X-Next-Cursor until exhausted
+  const fetchAllPages = async (path, params = {}) => {
+    const items = [];
+    let cursor = null;
+    do {
+      const pageParams = { limit: PAGE_SIZE, ...params };
+      const response = await axiosInstance.get(path, { params: cursor ? { ...pageParams, cursor } : pageParams });
+      items.push(...response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return items;
+  };
+
   const fetchData = async () => {
     try {
-      const [clientsRes, assetsRes, leadsRes, decksRes] = await Promise.all([
-        axiosInstance.get('/clients'),
-        axiosInstance.get('/assets'),
-        axiosInstance.get('/leads'),
-        axiosInstance.get('/decks')
+      const [clientsData, assetsData, leadsData, decksData] = await Promise.all([
+        fetchAllPages('/clients'),
+        fetchAllPages('/assets'),
+        fetchAllPages('/leads'),
+        fetchAllPages('/decks')
       ]);
-      setClients(clientsRes.data);
-      setAssets(assetsRes.data);
-      setLeads(leadsRes.data);
-      setDecks(decksRes.data);
+      setClients(clientsData);
+      setAssets(assetsData);
+      setLeads(leadsData);
+      setDecks(decksData);
     } catch (error) {
       console.error('Failed to fetch data:', error);
     }
@@ -332,7 +348,15 @@ function Dashboard() {
   const generateDeck = async (leadId) => {
     setGenerating(true);
     try {
-      const response = await axiosInstance.post('/decks/generate', { lead_id: leadId });
+      let { data: job } = await axiosInstance.post('/decks/generate', { lead_id: leadId });
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1500));
+        ({ data: job } = await axiosInstance.get(`/decks/jobs/${job.id}`));
+      }
+      if (job.status !== 'succeeded') {
+        throw new Error(job.error || 'Deck generation failed');
+      }
+      const response = await axiosInstance.get(`/decks/${job.deck_id}`);
       toast.success('Sales deck generated!');
       fetchData();
       setSelectedDeck(response.data);
@@ -343,6 +367,19 @@ function Dashboard() {
     }
   };
 
+  const regenerateSlide = async (index) => {
+    setRegeneratingSlide(index);
+    try {
+      const response = await axiosInstance.post(`/decks/${selectedDeck.id}/slides/${index}/regenerate`);
+      setSelectedDeck(response.data);
+      toast.success('Slide regenerated');
+    } catch (error) {
+      toast.error(error.response?.status === 409 ? 'Deck changed, please try again' : 'Failed to regenerate slide');
+    } finally {
+      setRegeneratingSlide(null);
+    }
+  };
+
   const viewDeck = async (deckId) => {
     try {
       const response = await axiosInstance.get(`/decks/${deckId}`);
@@ -479,7 +516,7 @@ function Dashboard() {
                     </div>
                   </CardHeader>
                   <CardContent>
-                    <p className="text-sm text-slate-600 whitespace-pre-wrap">{asset.content}</p>
+                    <p className="text-sm text-slate-600 whitespace-pre-wrap">{asset.content_preview ?? asset.content}</p>
                     {asset.file_name && (
                       <p className="text-xs text-slate-400 mt-2">Uploaded: {asset.file_name}</p>
                     )}
@@ -744,10 +781,35 @@ function Dashboard() {
             <div className="presentation-viewer">
               <DialogHeader>
                 <DialogTitle className="text-2xl">{selectedDeck.content.title}</DialogTitle>
+                <div className="flex gap-2 pt-2">
+                  <Button variant="outline" size="sm" asChild data-testid="export-pptx-button">
+                    <a href={`${API}/decks/${selectedDeck.id}/export?format=pptx`}>
+                      <Download className="w-4 h-4 mr-2" />
+                      PowerPoint
+                    </a>
+                  </Button>
+                  <Button variant="outline" size="sm" asChild data-testid="export-pdf-button">
+                    <a href={`${API}/decks/${selectedDeck.id}/export?format=pdf`}>
+                      <Download className="w-4 h-4 mr-2" />
+                      PDF
+                    </a>
+                  </Button>
+                </div>
               </DialogHeader>
               <div className="space-y-8 mt-6">
                 {selectedDeck.content.slides?.map((slide, index) => (
                   <div key={index} className="slide-content p-6 bg-gradient-to-br from-indigo-50 to-blue-50 rounded-lg border border-indigo-200" data-testid={`slide-${index}`}>
+                    <div className="flex justify-end">
+                      <Button
+                        variant="ghost"
+                        size="sm"
+                        disabled={regeneratingSlide !== null}
+                        onClick={() => regenerateSlide(index)}
+                        data-testid={`regenerate-slide-${index}`}
+                      >
+                        {regeneratingSlide === index ? <Loader2 className="w-4 h-4 animate-spin" /> : <Sparkles className="w-4 h-4" />}
+                      </Button>
+                    </div>
                     {slide.type === 'title' && (
                       <div className="text-center py-12">
                         <h2 className="text-4xl font-bold text-slate-900 mb-4">{slide.title}</h2>
@@ -0,0 +1,11 @@
+import os
+import sys
+from pathlib import Path
+
+# server.py reads its config at import time; nothing here talks to MongoDB
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "salesdeck_test")
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("RUN_MIGRATIONS", "false")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
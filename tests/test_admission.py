@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def make_controller(**overrides):
+    options = dict(max_concurrent=2, rate_per_minute=60, burst=3, deadline_seconds=10, expected_seconds=4)
+    options.update(overrides)
+    return server.AdmissionController(**options)
+
+
+def test_take_token_spends_burst_then_reports_refill_time(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+    controller = make_controller()
+    assert [controller.take_token("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert controller.take_token("a") == pytest.approx(1.0)
+    # Other users have their own bucket
+    assert controller.take_token("b") == 0.0
+    now[0] += 2
+    assert controller.take_token("a", cost=2) == 0.0
+
+
+def test_take_token_charges_cost(monkeypatch):
+    monkeypatch.setattr(server.time, "monotonic", lambda: 0.0)
+    controller = make_controller()
+    assert controller.take_token("a", cost=2) == 0.0
+    assert controller.take_token("a", cost=2) == pytest.approx(1.0)
+    assert controller.take_token("a", cost=1) == 0.0
+
+
+def test_estimated_wait_counts_backlog_and_cost():
+    controller = make_controller()
+    assert controller.estimated_wait() == 0.0
+    assert controller.estimated_wait(backlog=1) == 0.0
+    assert controller.estimated_wait(backlog=2) == pytest.approx(2.0)
+    assert controller.estimated_wait(backlog=0, cost=5) == pytest.approx(6.0)
+    controller.active = 2
+    assert controller.estimated_wait() == pytest.approx(2.0)
+
+
+def test_estimated_wait_is_bounded_by_deck_workers():
+    controller = make_controller(max_concurrent=8, max_workers=2)
+    assert controller.estimated_wait(backlog=1) == 0.0
+    # Four calls ahead drain two at a time, not eight
+    assert controller.estimated_wait(backlog=4) == pytest.approx(6.0)
+
+
+def test_admit_rejects_batches_past_burst_and_deadline(monkeypatch):
+    async def backlog():
+        return 20
+
+    controller = make_controller()
+    with pytest.raises(HTTPException) as oversized:
+        asyncio.run(controller.admit("a", cost=4))
+    assert oversized.value.status_code == 400
+
+    monkeypatch.setattr(server, "queued_llm_calls", backlog)
+    with pytest.raises(HTTPException) as busy:
+        asyncio.run(controller.admit("a", cost=3))
+    assert busy.value.status_code == 429
+    assert int(busy.value.headers["Retry-After"]) >= 1
+
+
+def test_slot_hands_off_round_robin_across_users():
+    controller = make_controller()
+    order = []
+
+    async def call(user, n):
+        async with controller.slot(user):
+            order.append(f"{user}{n}")
+            await asyncio.sleep(0.01)
+
+    async def main():
+        tasks = [asyncio.create_task(call("a", n)) for n in range(5)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(call("b", n)) for n in range(2)]
+        cancelled = asyncio.create_task(call("c", 0))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(*tasks, cancelled, return_exceptions=True)
+
+    asyncio.run(main())
+    assert order == ["a0", "a1", "a2", "b0", "a3", "b1", "a4"]
+    assert controller.active == 0
+    assert controller.queued == 0
@@ -0,0 +1,33 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+
+def test_exchanging_the_same_session_twice_succeeds(monkeypatch):
+    db = AsyncMongoMockClient()["auth_session"]
+    monkeypatch.setattr(server, "db", db)
+
+    async def fetch_session_data(session_id):
+        return {"id": "user-1", "email": "ada@example.com", "name": "Ada", "picture": "", "session_token": "token-1"}
+
+    async def create_indexes():
+        for collection in ("users", "user_sessions"):
+            await db[collection].create_indexes(server.INDEX_SPECS[collection])
+
+    async def stored():
+        return (
+            await db.users.count_documents({}),
+            await db.user_sessions.count_documents({"session_token": "token-1", "user_id": "user-1"}),
+        )
+
+    monkeypatch.setattr(server.auth_service, "fetch_session_data", fetch_session_data)
+    asyncio.run(create_indexes())
+    client = TestClient(server.app)
+
+    # React StrictMode posts the login exchange twice on mount
+    responses = [client.post("/api/auth/session", data={"session_id": "abc"}) for _ in range(2)]
+    assert [response.status_code for response in responses] == [200, 200]
+    assert asyncio.run(stored()) == (1, 1)
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def test_cursor_round_trips_created_at_and_id():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123000, tzinfo=timezone.utc)
+    cursor = server.encode_cursor({"created_at": created_at, "id": "abc-123"})
+    assert "=" not in cursor
+    assert server.decode_cursor(cursor) == (created_at, "abc-123")
+
+
+def test_naive_and_string_timestamps_are_read_as_utc():
+    naive = datetime(2024, 5, 1, 12, 0)
+    aware = naive.replace(tzinfo=timezone.utc)
+    assert server.decode_cursor(server.encode_cursor({"created_at": naive, "id": "a"}))[0] == aware
+    assert server.decode_cursor(server.encode_cursor({"created_at": naive.isoformat(), "id": "a"}))[0] == aware
+
+
+def test_offset_timestamps_keep_their_instant():
+    local = datetime(2024, 5, 1, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+    created_at, _ = server.decode_cursor(server.encode_cursor({"created_at": local, "id": "a"}))
+    assert created_at == datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", "e30", "eyJjIjogMX0"])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        server.decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_after_cursor_breaks_ties_on_id():
+    created_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    query = server.after_cursor(server.encode_cursor({"created_at": created_at, "id": "m"}))
+    assert query == {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": "m"}},
+    ]}
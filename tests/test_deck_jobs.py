@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+
+def test_stale_job_sweeper_runs_while_workers_are_busy(monkeypatch):
+    sweeps = []
+
+    async def requeue():
+        sweeps.append(True)
+        if len(sweeps) == 2:
+            raise RuntimeError("mongo unavailable")
+
+    monkeypatch.setattr(server, "DECK_JOB_SWEEP_SECONDS", 0.01)
+    monkeypatch.setattr(server, "requeue_stale_deck_jobs", requeue)
+
+    async def main():
+        sweeper = asyncio.create_task(server.stale_deck_job_sweeper())
+        await asyncio.sleep(0.1)
+        sweeper.cancel()
+        await asyncio.gather(sweeper, return_exceptions=True)
+        return sweeper
+
+    sweeper = asyncio.run(main())
+    # A failed sweep is logged and the next one still runs
+    assert len(sweeps) > 2
+    assert sweeper.cancelled()
+
+
+def test_one_users_burst_does_not_hold_every_worker(monkeypatch):
+    # mongomock re-runs the filter to return the updated document unless _id
+    # is projected, so a claim would come back empty or as the wrong job
+    find_and_modify = mongomock.collection.Collection._find_and_modify
+
+    def find_and_modify_by_id(self, query, projection=None, *args, **kwargs):
+        doc = find_and_modify(self, query, None, *args, **kwargs)
+        if doc:
+            doc.pop("_id")
+        return doc
+
+    monkeypatch.setattr(mongomock.collection.Collection, "_find_and_modify", find_and_modify_by_id)
+    monkeypatch.setattr(server, "db", AsyncMongoMockClient()["deck_jobs"])
+
+    started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    async def enqueue(user_id, n):
+        job = server.DeckJob(user_id=user_id, lead_id=f"lead-{n}", created_at=started + timedelta(seconds=n))
+        await server.db.deck_jobs.insert_one(job.model_dump())
+        return job
+
+    async def main():
+        burst = [await enqueue("a", n) for n in range(25)]
+        single = await enqueue("b", 25)
+        return burst, single, [await server._claim_deck_job() for _ in range(3)]
+
+    burst, single, claimed = asyncio.run(main())
+    # b's job was queued last but gets the second free worker
+    assert [job["id"] for job in claimed] == [burst[0].id, single.id, burst[1].id]
+    assert all(job["status"] == "running" for job in claimed)
@@ -0,0 +1,58 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from mongomock_motor import AsyncMongoMockClient
+from starlette.requests import Request
+
+import server
+
+
+def request_with(headers):
+    raw = [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_etag_matches_if_none_match_lists_and_wildcard():
+    etag = '"abc-pdf"'
+    assert server.etag_matches(request_with({"If-None-Match": etag}), etag)
+    assert server.etag_matches(request_with({"If-None-Match": '"x", "abc-pdf"'}), etag)
+    assert server.etag_matches(request_with({"If-None-Match": "*"}), etag)
+    assert not server.etag_matches(request_with({"If-None-Match": '"x"'}), etag)
+    assert not server.etag_matches(request_with({}), etag)
+
+
+class MemoryBlobs:
+    def __init__(self):
+        self.puts = 0
+
+    async def put(self, chunks):
+        data = b"".join([chunk async for chunk in chunks])
+        self.puts += 1
+        return f"sha-{self.puts}", len(data)
+
+    async def release(self, sha256):
+        pass
+
+
+def test_concurrent_exports_render_once_and_drop_the_lock(monkeypatch):
+    renders = []
+
+    def render(content):
+        renders.append(content)
+        return b"deck"
+
+    blobs = MemoryBlobs()
+    monkeypatch.setattr(server, "db", AsyncMongoMockClient()["exports"])
+    monkeypatch.setattr(server, "blob_store", blobs)
+    monkeypatch.setattr(server, "get_process_pool", lambda: ThreadPoolExecutor(1))
+    monkeypatch.setitem(server.DECK_EXPORT_FORMATS, "pdf", (render, "application/pdf"))
+    deck = {"id": "d1", "user_id": "u1", "content": {"title": "Deck", "slides": []}}
+
+    async def main():
+        return await asyncio.gather(*[server.get_deck_export(deck, "pdf") for _ in range(5)])
+
+    exports = asyncio.run(main())
+    assert len(renders) == 1
+    assert blobs.puts == 1
+    assert {export["blob_sha256"] for export in exports} == {"sha-1"}
+    assert server._export_locks == {}
@@ -0,0 +1,34 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+
+def test_stale_running_extractions_are_requeued(monkeypatch):
+    db = AsyncMongoMockClient()["extraction"]
+    monkeypatch.setattr(server, "db", db)
+    started = []
+
+    async def run_extraction(asset_id):
+        started.append(asset_id)
+
+    monkeypatch.setattr(server, "run_extraction", run_extraction)
+    now = datetime.now(timezone.utc)
+
+    async def main():
+        await db.assets.insert_many([
+            {"id": "stale", "extraction_status": "running",
+             "extraction_started_at": now - timedelta(seconds=server.STALE_EXTRACTION_SECONDS + 5)},
+            {"id": "busy", "extraction_status": "running", "extraction_started_at": now},
+            {"id": "pending", "extraction_status": "pending"},
+        ])
+        await server.requeue_stale_extractions()
+        await asyncio.sleep(0)
+        return {asset["id"]: asset["extraction_status"] async for asset in db.assets.find({})}
+
+    statuses = asyncio.run(main())
+    assert statuses == {"stale": "pending", "busy": "running", "pending": "pending"}
+    # Only the requeued asset is handed out again; pending uploads already have a task
+    assert started == ["stale"]
@@ -0,0 +1,55 @@
+import asyncio
+import tempfile
+
+import server
+
+
+def parse(data: bytes, fmt: str = "csv"):
+    spool = tempfile.SpooledTemporaryFile()
+    spool.write(data)
+    spool.seek(0)
+
+    async def collect():
+        return [record async for record in server.iter_import_records(spool, fmt)]
+
+    return asyncio.run(collect())
+
+
+def test_quote_inside_unquoted_field_does_not_swallow_later_rows():
+    rows = parse(b'name,industry,description\nAcme,Retail,27" monitor\nBeta,Bank,plain\nGamma,Energy,also plain\n')
+    assert [row for row, _ in rows] == [1, 2, 3]
+    assert rows[0][1]["description"] == '27" monitor'
+    assert rows[2][1]["name"] == "Gamma"
+
+
+def test_quoted_field_with_embedded_newline_and_escaped_quotes():
+    rows = parse(b'name,industry,description\nAcme,Retail,"first line\nsecond ""quoted"" line"\nBeta,Bank,x\n')
+    assert rows[0] == (1, {"name": "Acme", "industry": "Retail", "description": 'first line\nsecond "quoted" line'})
+    assert rows[1][1]["name"] == "Beta"
+
+
+def test_bom_and_crlf_line_endings():
+    rows = parse("﻿name,industry,description\r\nAcmé,Retail,a\r\nBeta,Bank,\"b\r\nc\"\r\n".encode("utf-8"))
+    assert rows[0][1] == {"name": "Acmé", "industry": "Retail", "description": "a"}
+    assert rows[1][1]["description"] == "b\r\nc"
+
+
+def test_column_count_mismatch_is_a_row_error():
+    rows = parse(b"name,industry,description\nAcme,Retail\n\nBeta,Bank,x\n")
+    assert rows[0] == (1, "Expected 3 columns, got 2")
+    assert rows[1][1]["name"] == "Beta"
+
+
+def test_rows_span_several_read_batches(monkeypatch):
+    monkeypatch.setattr(server, "IMPORT_BATCH_SIZE", 2)
+    body = "name,industry,description\n" + "".join(f'C{n},I,"d\n{n}"\n' for n in range(7))
+    rows = parse(body.encode())
+    assert [record["name"] for _, record in rows] == [f"C{n}" for n in range(7)]
+
+
+def test_ndjson_records_and_errors():
+    rows = parse(b'{"a": 1}\r\n\n[1]\nnope\n{"b": "\xc3\xa9"}', "ndjson")
+    assert rows[0] == (1, {"a": 1})
+    assert rows[1] == (2, "Expected a JSON object")
+    assert rows[2][1].startswith("Invalid JSON")
+    assert rows[3] == (4, {"b": "é"})
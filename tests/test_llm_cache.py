@@ -0,0 +1,40 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+
+
+def test_cache_size_counter_follows_puts_evictions_and_reconcile(monkeypatch):
+    db = AsyncMongoMockClient()["llm_cache"]
+    monkeypatch.setattr(server, "db", db)
+    cache = server.LLMResponseCache(ttl_seconds=60, max_bytes=10)
+
+    async def counted():
+        return (await db.cache_usage.find_one({"_id": cache.USAGE_ID}))["bytes"]
+
+    async def stored():
+        return sum([entry["size"] async for entry in db.llm_cache.find({}, {"size": 1})])
+
+    async def main():
+        observed = []
+        await cache.put("a", "m", "aaaa")
+        await cache.put("b", "m", "bbbb")
+        # Replacing an entry only counts the difference in size
+        await cache.put("a", "m", "aa")
+        observed.append((await counted(), await stored()))
+        await cache.put("c", "m", "cccccc")
+        observed.append((await counted(), await stored()))
+        # Entries removed by the TTL index are picked up by reconcile_size
+        await db.llm_cache.delete_one({"_id": "c"})
+        await db.cache_usage.update_one({"_id": cache.USAGE_ID}, {"$inc": {"bytes": 100}})
+        await cache.reconcile_size()
+        observed.append((await counted(), await stored()))
+        return observed
+
+    observed = asyncio.run(main())
+    assert observed[0] == (6, 6)
+    counted, stored = observed[1]
+    assert counted == stored <= 10
+    assert cache.evictions == 1
+    assert observed[2][0] == observed[2][1]
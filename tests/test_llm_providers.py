@@ -0,0 +1,29 @@
+import asyncio
+from types import SimpleNamespace
+
+import server
+
+
+def test_litellm_provider_yields_each_streamed_delta():
+    calls = []
+
+    async def acompletion(**kwargs):
+        calls.append(kwargs)
+
+        async def chunks():
+            for text in ('{"title": ', None, '"Deck"}'):
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+            yield SimpleNamespace(choices=[])
+
+        return chunks()
+
+    provider = server.LiteLLMProvider("openai", "gpt-4o")
+    provider._acompletion = acompletion
+
+    async def collect():
+        return [chunk async for chunk in provider.stream("system", "prompt", "session")]
+
+    assert asyncio.run(collect()) == ['{"title": ', '"Deck"}']
+    assert calls[0]["model"] == "openai/gpt-4o"
+    assert calls[0]["stream"] is True
+    assert [message["role"] for message in calls[0]["messages"]] == ["system", "user"]
@@ -0,0 +1,39 @@
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=500-5000", (500, 999)),
+    (" bytes = 10 - 20 ", (10, 20)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert server.parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=0-1,5-9",
+    "items=0-9",
+    "bytes=-",
+    "bytes=9-1",
+    "garbage",
+])
+def test_unsupported_ranges_serve_the_full_body(header):
+    assert server.parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=0-", 0),
+])
+def test_unsatisfiable_ranges_raise_416(header, size):
+    with pytest.raises(HTTPException) as error:
+        server.parse_range(header, size)
+    assert error.value.status_code == 416
+    assert error.value.headers["Content-Range"] == f"bytes */{size}"
@@ -0,0 +1,37 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+import server
+
+
+def request_seconds(method, route, status):
+    series = server.HTTP_REQUEST_SECONDS._series.get((method, route, status))
+    return (series[-2], series[-1]) if series else (0.0, 0)
+
+
+def test_streamed_responses_are_timed_until_the_last_chunk(monkeypatch):
+    app = FastAPI()
+
+    @app.get("/slow-stream")
+    async def slow_stream():
+        async def chunks():
+            for _ in range(3):
+                await asyncio.sleep(0.05)
+                yield b"chunk\n"
+        return StreamingResponse(chunks())
+
+    # route_template resolves against whichever app is being served
+    monkeypatch.setattr(server, "app", app)
+    app.add_middleware(server.RequestMetricsMiddleware)
+    before_sum, before_count = request_seconds("GET", "/slow-stream", "200")
+
+    response = TestClient(app).get("/slow-stream")
+
+    assert response.text == "chunk\n" * 3
+    total, count = request_seconds("GET", "/slow-stream", "200")
+    assert count == before_count + 1
+    assert total - before_sum >= 0.15
+    assert server.HTTP_IN_FLIGHT._values.get(("GET", "/slow-stream"), 0) == 0
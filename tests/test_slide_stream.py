@@ -0,0 +1,56 @@
+import json
+
+import server
+
+DECK = {
+    "title": "Q3 \"Growth\" Plan",
+    "slides": [
+        {"type": "problem", "title": "Churn {is} up", "points": ["a", "b [c]"]},
+        {"type": "roi", "title": "Payback", "metrics": [{"label": "ROI", "value": "150%"}]},
+    ],
+}
+
+
+def feed_in_chunks(text, size):
+    parser = server.SlideStreamParser()
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return parser, events
+
+
+def test_emits_title_and_each_slide_whatever_the_chunking():
+    text = json.dumps(DECK)
+    for size in (1, 3, 7, len(text)):
+        parser, events = feed_in_chunks(text, size)
+        assert events == [
+            ("title", {"title": DECK["title"]}),
+            ("slide", {"index": 0, "slide": DECK["slides"][0]}),
+            ("slide", {"index": 1, "slide": DECK["slides"][1]}),
+        ]
+        assert parser.complete
+        assert parser.slides == DECK["slides"]
+
+
+def test_slide_is_emitted_before_the_response_finishes():
+    text = json.dumps(DECK)
+    cut = text.index('{"type": "roi"')
+    parser = server.SlideStreamParser()
+    events = parser.feed(text[:cut])
+    assert [kind for kind, _ in events] == ["title", "slide"]
+    assert not parser.complete
+
+
+def test_ignores_code_fence_and_trailing_text():
+    text = "```json\n" + json.dumps(DECK) + "\n```\n{\"title\": \"ignored\"}"
+    parser, events = feed_in_chunks(text, 5)
+    assert parser.title == DECK["title"]
+    assert len(parser.slides) == 2
+    assert parser.complete
+
+
+def test_nested_title_keys_do_not_replace_the_deck_title():
+    text = json.dumps({"slides": [{"title": "Slide"}], "title": "Deck"})
+    parser, events = feed_in_chunks(text, 4)
+    assert parser.title == "Deck"
+    assert events[0] == ("slide", {"index": 0, "slide": {"title": "Slide"}})
@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+
+import server
+
+client = TestClient(server.app)
+
+
+def test_system_routes_are_hidden_without_a_token(monkeypatch):
+    monkeypatch.delenv("METRICS_TOKEN", raising=False)
+    assert client.get("/api/system/llm-cache").status_code == 404
+    assert client.get("/api/system/session-cache").status_code == 404
+
+
+def test_system_routes_require_the_metrics_token(monkeypatch):
+    monkeypatch.setenv("METRICS_TOKEN", "s3cret")
+    assert client.get("/api/system/llm-cache").status_code == 401
+    assert client.get("/api/system/indexes", headers={"Authorization": "Bearer nope"}).status_code == 401
+    response = client.get("/api/system/llm-cache", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert response.json() == server.llm_cache.stats()
+    response = client.get("/api/system/session-cache", headers={"Authorization": "Bearer s3cret"})
+    assert response.json() == server.session_cache.stats()
+
+
+def test_session_cache_stats_are_not_served_to_users():
+    assert client.get("/api/auth/cache-stats").status_code == 404